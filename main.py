@@ -1,10 +1,37 @@
+import sqlite3
+import sys
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from views.client_view import build_client_tab
 from views.item_view import build_item_tab
 from views.order_view import build_order_tab
 from views.order_list_view import build_orders_list_tab
 from views.account_view import build_account_tab
+from views.dashboard_view import build_dashboard_tab
+from utils.connection import DB_PATH, close_all
+from utils.db_worker import get_worker, shutdown_worker
+from utils.migrations import run_migrations
+from utils.recurrence import generate_recurring_accounts
+
+# Create or upgrade the database schema before any tab queries it. A failed
+# upgrade leaves the database untouched; tell the user why before exiting.
+try:
+    run_migrations()
+except sqlite3.Error as error:
+    error_root = tk.Tk()
+    error_root.withdraw()
+    messagebox.showerror(
+        "Erro ao atualizar o banco de dados",
+        f"Não foi possível atualizar o banco de dados:\n{DB_PATH}\n\n{error}\n\n"
+        "A atualização foi interrompida sem perder dados. Corrija os registros listados e abra o sistema novamente."
+    )
+    error_root.destroy()
+    close_all()
+    sys.exit(1)
+
+# Create the upcoming occurrences of recurring accounts (only series that are
+# behind the horizon are read, so this is cheap on every start)
+generate_recurring_accounts()
 
 # Create the main application window
 root = tk.Tk()
@@ -22,20 +49,66 @@ tab_itens = tk.Frame(notebook, bg="#f9f9f9")
 tab_ordens = tk.Frame(notebook, bg="#f9f9f9")
 tab_lista_ordens = tk.Frame(notebook, bg="#f9f9f9")
 tab_contas = tk.Frame(notebook, bg="#f9f9f9")
+tab_dashboard = tk.Frame(notebook, bg="#f9f9f9")
+
+# Add tabs to the notebook, each with the function that builds its interface
+tab_builders = {}
+
+
+def add_tab(frame, text, builder):
+    notebook.add(frame, text=text)
+    tab_builders[str(frame)] = builder
+
+
+add_tab(tab_clientes, "👤 Clientes", build_client_tab)
+add_tab(tab_itens, "🧾 Itens de Serviço", build_item_tab)
+add_tab(tab_ordens, "📦 Cadastro de Ordens", build_order_tab)
+add_tab(tab_lista_ordens, "📋 Lista de Ordens", build_orders_list_tab)
+add_tab(tab_contas, "💰 Contas a Pagar", build_account_tab)
+add_tab(tab_dashboard, "📊 Dashboard", build_dashboard_tab)
+
+# Set to False to build tabs only when they are first opened
+PREBUILD_TABS_WHEN_IDLE = True
+
+
+def build_tab(frame_name):
+    """Build a tab's interface (and run its initial queries) only once."""
+    builder = tab_builders.pop(frame_name, None)
+    if builder is not None:
+        builder(notebook.nametowidget(frame_name))
 
-# Add tabs to the notebook
-notebook.add(tab_clientes, text="👤 Clientes")
-notebook.add(tab_itens, text="🧾 Itens de Serviço")
-notebook.add(tab_ordens, text="📦 Cadastro de Ordens")
-notebook.add(tab_lista_ordens, text="📋 Lista de Ordens")
-notebook.add(tab_contas, text="💰 Contas a Pagar")
 
-# Build each tab interface
-build_client_tab(tab_clientes)
-build_item_tab(tab_itens)
-build_order_tab(tab_ordens)
-build_orders_list_tab(tab_lista_ordens)
-build_account_tab(tab_contas)
+def on_tab_changed(event):
+    build_tab(notebook.select())
+
+
+def prebuild_next_tab():
+    # One tab per idle slot, so the window stays responsive meanwhile
+    if tab_builders:
+        build_tab(next(iter(tab_builders)))
+        root.after(100, lambda: root.after_idle(prebuild_next_tab))
+
+
+# Tabs are built on first selection; only the visible one is built at startup
+notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+build_tab(notebook.select())
+if PREBUILD_TABS_WHEN_IDLE:
+    root.after(500, lambda: root.after_idle(prebuild_next_tab))
+
+# Keep the recurring accounts horizon moving while the app stays open
+RECURRENCE_CHECK_MS = 60 * 60 * 1000
+
+
+def schedule_recurring_accounts():
+    get_worker(root).submit(generate_recurring_accounts)
+    root.after(RECURRENCE_CHECK_MS, schedule_recurring_accounts)
+
+
+root.after(RECURRENCE_CHECK_MS, schedule_recurring_accounts)
 
 # Start the main loop
-root.mainloop()
\ No newline at end of file
+root.mainloop()
+
+# Stop the background worker and close pooled database connections on exit
+shutdown_worker()
+close_all()
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import connection, migrations
+from utils.connection import get_connection, read_cursor, transaction
+
+
+class LegacyUpgradeTest(unittest.TestCase):
+    """Upgrade of a database at version 4 through the table rebuilds of
+    versions 5 (foreign keys) and 6 (ISO dates)."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(connection, "DB_PATH", os.path.join(self.tmp.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(connection.close_all)
+
+        legacy = [m for m in migrations.MIGRATIONS if m[0] < 5]
+        with mock.patch.object(migrations, "MIGRATIONS", legacy):
+            migrations.run_migrations()
+
+        # Old data, written while foreign keys were not enforced
+        get_connection().execute("PRAGMA foreign_keys = OFF")
+        with transaction() as cursor:
+            cursor.execute("INSERT INTO clients (id, name) VALUES (1, 'Maria')")
+            cursor.execute("INSERT INTO service_items (id, name, price) VALUES (10, 'Afiação', 5)")
+            cursor.executemany("""
+                INSERT INTO orders (id, client_id, date, status, completion_date)
+                VALUES (?, ?, ?, 'Pendente', ?)
+            """, [
+                (1, 1, "05/03/2024", "2024-03-10"),
+                (2, 99, "2024-3-7", ""),     # deleted client, unpadded date
+            ])
+            cursor.executemany("""
+                INSERT INTO order_items (id, order_id, item_id, quantity, unit_price)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (1, 1, 10, 2, 5.0),
+                (2, 1, 77, 1, 3.0),          # deleted service item
+                (3, 42, 10, 1, 5.0),         # line of a deleted order
+            ])
+            cursor.execute("""
+                INSERT INTO accounts (id, name, amount, due_date, recurring, paid)
+                VALUES (1, 'Luz', 80, '1/2/2024', 0, 0)
+            """)
+        get_connection().execute("PRAGMA foreign_keys = ON")
+
+    def _rows(self, query):
+        with read_cursor() as cursor:
+            return cursor.execute(query).fetchall()
+
+    def test_upgrade_keeps_and_cleans_data(self):
+        version = migrations.run_migrations()
+
+        self.assertEqual(version, migrations.MIGRATIONS[-1][0])
+        self.assertEqual(
+            self._rows("SELECT id, client_id, date, completion_date, total FROM orders ORDER BY id"),
+            [(1, 1, "2024-03-05", "2024-03-10", 13.0), (2, None, "2024-03-07", None, 0)],
+        )
+        self.assertEqual(
+            self._rows("SELECT id, order_id, item_id FROM order_items ORDER BY id"),
+            [(1, 1, 10), (2, 1, None)],
+        )
+        self.assertEqual(self._rows("SELECT due_date FROM accounts"), [("2024-02-01",)])
+        self.assertEqual(self._rows("PRAGMA foreign_key_check"), [])
+
+        # Deleting an order now cascades to its lines
+        with transaction() as cursor:
+            cursor.execute("DELETE FROM orders WHERE id = 1")
+        self.assertEqual(self._rows("SELECT id FROM order_items"), [])
+
+    def test_invalid_dates_abort_without_changes(self):
+        with transaction() as cursor:
+            cursor.execute("UPDATE orders SET date = 'amanhã' WHERE id = 2")
+            cursor.execute("UPDATE accounts SET due_date = NULL WHERE id = 1")
+
+        with self.assertRaises(sqlite3.IntegrityError) as raised:
+            migrations.run_migrations()
+
+        self.assertIn("orders.date id=2", str(raised.exception))
+        self.assertIn("accounts.due_date id=1", str(raised.exception))
+        # Version 5 committed; version 6 rolled back with the data untouched
+        self.assertEqual(migrations.get_schema_version(), 5)
+        self.assertEqual(
+            self._rows("SELECT id, date FROM orders ORDER BY id"),
+            [(1, "05/03/2024"), (2, "amanhã")],
+        )
+        self.assertEqual(self._rows("SELECT due_date FROM accounts"), [(None,)])
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import connection, migrations
+from utils.connection import read_cursor, transaction
+from utils.db_utils import _diff_order_lines, get_order_items, save_order_with_items
+
+
+class DiffOrderLinesTest(unittest.TestCase):
+
+    STORED = [(1, 10, 2, 5.0), (2, 20, 1, 30.0)]
+
+    def test_unchanged_lines_need_no_writes(self):
+        lines = [(1, 10, 2, 5.0), (2, 20, 1, 30.0)]
+        self.assertEqual(_diff_order_lines(self.STORED, lines), ([], [], []))
+
+    def test_changed_removed_and_new_lines(self):
+        lines = [(1, 10, 3, 5.0), (None, 30, 1, 12.5)]
+        inserts, updates, deletes = _diff_order_lines(self.STORED, lines)
+        self.assertEqual(inserts, [(30, 1, 12.5)])
+        self.assertEqual(updates, [(10, 3, 5.0, 1)])
+        self.assertEqual(deletes, [(2,)])
+
+    def test_duplicate_and_unknown_line_ids_are_inserted(self):
+        lines = [(1, 10, 2, 5.0), (1, 10, 2, 5.0), (99, 20, 1, 30.0)]
+        inserts, updates, deletes = _diff_order_lines(self.STORED, lines)
+        self.assertEqual(inserts, [(10, 2, 5.0), (20, 1, 30.0)])
+        self.assertEqual(updates, [])
+        self.assertEqual(deletes, [(2,)])
+
+
+class SaveOrderWithItemsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(connection, "DB_PATH", os.path.join(self.tmp.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(connection.close_all)
+        migrations.run_migrations()
+
+        with transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO service_items (id, name, price) VALUES (?, ?, ?)",
+                [(10, "Afiação", 5.0), (20, "Conserto", 30.0), (30, "Costura", 12.5)],
+            )
+
+    def _save(self, order_id, items):
+        return save_order_with_items(order_id, None, "2024-03-05", "Pendente", "Retirada", "", items)
+
+    def _total(self, order_id):
+        with read_cursor() as cursor:
+            return cursor.execute("SELECT total FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+
+    def test_new_order_inserts_every_line(self):
+        order_id = self._save(None, [(None, 10, 2, 5.0), (None, 20, 1, 30.0)])
+
+        lines = get_order_items(order_id)
+        self.assertEqual([line[1:] for line in lines], [(10, 2, 5.0), (20, 1, 30.0)])
+        self.assertEqual(self._total(order_id), 40.0)
+
+    def test_edit_applies_only_the_changes(self):
+        order_id = self._save(None, [(None, 10, 2, 5.0), (None, 20, 1, 30.0)])
+        first, second = get_order_items(order_id)
+
+        # Change the first line, drop the second and add the same item again
+        self._save(order_id, [(first[0], 10, 3, 5.0), (None, 20, 2, 30.0)])
+
+        lines = get_order_items(order_id)
+        self.assertEqual(lines[0], (first[0], 10, 3, 5.0))
+        self.assertEqual(len(lines), 2)
+        self.assertNotEqual(lines[1][0], second[0])
+        self.assertEqual(lines[1][1:], (20, 2, 30.0))
+        self.assertEqual(self._total(order_id), 75.0)
+
+    def test_removing_every_line_zeroes_the_total(self):
+        order_id = self._save(None, [(None, 30, 2, 12.5)])
+        self._save(order_id, [])
+
+        self.assertEqual(get_order_items(order_id), [])
+        self.assertEqual(self._total(order_id), 0)
+
+    def test_failed_save_changes_nothing(self):
+        order_id = self._save(None, [(None, 10, 2, 5.0)])
+        line = get_order_items(order_id)[0]
+
+        # Unknown service item: the foreign key fails and the whole save rolls back
+        with self.assertRaises(sqlite3.IntegrityError):
+            self._save(order_id, [(line[0], 10, 9, 5.0), (None, 999, 1, 1.0)])
+
+        self.assertEqual(get_order_items(order_id), [line])
+        self.assertEqual(self._total(order_id), 10.0)
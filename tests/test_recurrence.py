@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from utils import connection, migrations
+from utils.connection import read_cursor, transaction
+from utils.date_utils import to_iso
+from utils.db_utils import insert_account, update_account
+from utils.recurrence import generate_recurring_accounts, nth_occurrence
+
+
+def _months_from(start, months):
+    return nth_occurrence(start, "monthly", months)
+
+
+class RecurrenceRulesTest(unittest.TestCase):
+
+    def test_monthly_clamps_without_drifting(self):
+        start = date(2024, 1, 31)
+        self.assertEqual(
+            [nth_occurrence(start, "monthly", n) for n in range(4)],
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+
+    def test_weekly_and_yearly(self):
+        self.assertEqual(nth_occurrence(date(2024, 1, 1), "weekly", 2), date(2024, 1, 15))
+        self.assertEqual(nth_occurrence(date(2024, 2, 29), "yearly", 1), date(2025, 2, 28))
+
+
+class GenerateRecurringAccountsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(connection, "DB_PATH", os.path.join(self.tmp.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(connection.close_all)
+        self.today = date.today()
+
+    def _accounts(self):
+        with read_cursor() as cursor:
+            return cursor.execute("""
+                SELECT id, name, due_date, paid, series_id, recurrence
+                FROM accounts
+                ORDER BY due_date, id
+            """).fetchall()
+
+    def test_legacy_monthly_bills_become_one_series(self):
+        # Schema as it was before recurring accounts were generated
+        legacy = [m for m in migrations.MIGRATIONS if m[0] < 9]
+        with mock.patch.object(migrations, "MIGRATIONS", legacy):
+            migrations.run_migrations()
+
+        month = self.today.replace(day=1)
+        with transaction() as cursor:
+            cursor.executemany("""
+                INSERT INTO accounts (name, amount, due_date, recurring, paid)
+                VALUES (?, 1000, ?, 1, ?)
+            """, [
+                ("Aluguel", to_iso(_months_from(month, -2)), 1),
+                ("Aluguel", to_iso(_months_from(month, -1)), 1),
+                ("Aluguel", to_iso(month), 0),
+            ])
+
+        migrations.run_migrations()
+        generate_recurring_accounts(self.today)
+
+        accounts = self._accounts()
+        template_id = accounts[2][0]
+        self.assertEqual([a[5] for a in accounts], [None, None, "monthly"] + [None] * (len(accounts) - 3))
+        self.assertTrue(all(a[4] == template_id for a in accounts))
+
+        # One bill per month, nothing past due was generated
+        due_dates = [a[2] for a in accounts]
+        self.assertEqual(len(due_dates), len(set(due_dates)))
+        generated = accounts[3:]
+        self.assertTrue(generated)
+        self.assertTrue(all(a[2] > to_iso(self.today) and not a[3] for a in generated))
+
+        self.assertEqual(generate_recurring_accounts(self.today), 0)
+
+    def test_enabling_recurrence_does_not_backfill(self):
+        migrations.run_migrations()
+        account_id = insert_account("Internet", 100, "2020-01-10", False, True)
+        update_account(account_id, "Internet", 100, "2020-01-10", True, True, "monthly")
+
+        created = generate_recurring_accounts(self.today)
+
+        generated = [a for a in self._accounts() if a[0] != account_id]
+        self.assertEqual(len(generated), created)
+        self.assertTrue(all(a[2] > to_iso(self.today) for a in generated))
+        self.assertLessEqual(created, 4)
+
+    def test_new_series_up_to_horizon(self):
+        migrations.run_migrations()
+        start = self.today + timedelta(days=1)
+        insert_account("Faxina", 50, to_iso(start), True, False, "weekly")
+
+        generate_recurring_accounts(self.today, horizon_days=28)
+
+        due_dates = [a[2] for a in self._accounts()]
+        self.assertEqual(due_dates, [to_iso(start + timedelta(weeks=n)) for n in range(4)])
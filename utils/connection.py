@@ -0,0 +1,114 @@
+import sqlite3
+import os
+import threading
+from contextlib import contextmanager
+
+# Database location (resolved once, not on every query)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.normpath(os.path.join(BASE_DIR, "../db/servico_facil.db"))
+
+# PRAGMAs applied once to every new connection
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",       # ~16 MB page cache
+    "PRAGMA mmap_size = 268435456",     # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = ON",
+]
+
+_local = threading.local()
+_lock = threading.Lock()
+_connections = []
+_generation = 0  # bumped by close_all() so threads drop stale connections
+_write_count = 0  # bumped on every committed transaction (see write_count())
+
+
+def _open_connection():
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+    # isolation_level=None: transactions are opened explicitly by transaction()
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection():
+    """Return the long-lived connection owned by the current thread."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        conn = _open_connection()
+        with _lock:
+            _connections.append(conn)
+        _local.conn = conn
+        _local.generation = _generation
+    return conn
+
+
+@contextmanager
+def read_cursor():
+    """Cursor for read-only queries on the thread's connection."""
+    cursor = get_connection().cursor()
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def transaction(immediate=True):
+    """Cursor inside a transaction: commit on success, rollback on error.
+
+    Nested calls join the outer transaction, so helpers can be composed
+    into a single atomic unit of work. Write transactions take the write
+    lock up front (BEGIN IMMEDIATE): a deferred transaction that reads and
+    then writes fails at once with "database is locked" if another
+    connection committed in between, without waiting for busy_timeout.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if conn.in_transaction:
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+        return
+
+    cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield cursor
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+        _note_write()
+    finally:
+        cursor.close()
+
+
+def _note_write():
+    global _write_count
+    with _lock:
+        _write_count += 1
+
+
+def write_count():
+    """Number of transactions committed by this process.
+
+    Caches of derived data (reports) compare it to know when a write may
+    have made them stale.
+    """
+    return _write_count
+
+
+def close_all():
+    """Close every pooled connection (call on application exit)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        while _connections:
+            _connections.pop().close()
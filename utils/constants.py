@@ -2,4 +2,10 @@
 ORDER_STATUS = ["Pendente", "Em progresso", "Concluído"]
 
 # Delivery methods
-DELIVERY_METHODS = ["Entrega", "Retirada"]
\ No newline at end of file
+DELIVERY_METHODS = ["Entrega", "Retirada"]
+
+# Recurrence rules for recurring accounts (label -> stored rule)
+RECURRENCE_RULES = {"Mensal": "monthly", "Semanal": "weekly", "Anual": "yearly"}
+
+# How far ahead occurrences of recurring accounts are generated
+RECURRENCE_HORIZON_DAYS = 90
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+# Dates are stored as ISO strings (YYYY-MM-DD), so they sort and compare
+# correctly in SQL; the UI shows and accepts the Brazilian format.
+ISO_FORMAT = "%Y-%m-%d"
+BR_FORMAT = "%d/%m/%Y"
+
+# Formats accepted when reading legacy or user-typed values
+_INPUT_FORMATS = (BR_FORMAT, ISO_FORMAT, "%Y-%m-%d %H:%M:%S", "%d-%m-%Y", "%d/%m/%y")
+
+
+def parse_date(date_str):
+    """Parse a date in any accepted format; None if empty or invalid."""
+    if not date_str:
+        return None
+
+    date_str = str(date_str).strip()
+    for fmt in _INPUT_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def br_to_iso(date_str):
+    """DD/MM/YYYY -> YYYY-MM-DD; raises ValueError on invalid dates."""
+    return datetime.strptime(date_str.strip(), BR_FORMAT).strftime(ISO_FORMAT)
+
+
+def iso_to_br(date_str):
+    """YYYY-MM-DD -> DD/MM/YYYY for display; other values pass through."""
+    if not date_str:
+        return ""
+    try:
+        return datetime.strptime(date_str, ISO_FORMAT).strftime(BR_FORMAT)
+    except ValueError:
+        return date_str
+
+
+def to_iso(date_value):
+    """Normalize a date object or an accepted date string to ISO (or None)."""
+    if hasattr(date_value, "strftime"):
+        return date_value.strftime(ISO_FORMAT)
+    parsed = parse_date(date_value)
+    return parsed.strftime(ISO_FORMAT) if parsed else None
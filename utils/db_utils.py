@@ -1,263 +1,635 @@
-import sqlite3
-import os
-
-def connect_db():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(base_dir, "../db/servico_facil.db")
-    conn = sqlite3.connect(db_path)
-    return conn
+import json
+import re
+from datetime import date
 
+from utils.connection import read_cursor, transaction
+from utils.date_utils import to_iso
+from utils.instrumentation import instrumented
+from utils.prefix_index import PrefixIndex
+from utils.reference_cache import ReferenceCache
 
 
 #CRUD Clients
+@instrumented
 def insert_client(name, phone, address, email):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO clients (name, phone, address, email)
-        VALUES (?, ?, ?, ?)
-    """, (name, phone, address, email))
-
-    conn.commit()
-    conn.close()
-
+    with transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO clients (name, phone, address, email)
+            VALUES (?, ?, ?, ?)
+        """, (name, phone, address, email))
+    clients_cache.invalidate()
+
+@instrumented
 def get_all_clients():
-    conn = connect_db()
-    cursor = conn.cursor()
+    with read_cursor() as cursor:
+        cursor.execute("SELECT id, name, phone, address, email FROM clients")
+        return cursor.fetchall()
 
-    cursor.execute("SELECT id, name, phone, address, email FROM clients")
-    clients = cursor.fetchall()
+# Shared snapshot of get_all_clients, reloaded only after a client write
+clients_cache = ReferenceCache(get_all_clients)
 
-    conn.close()
-    return clients
+def get_cached_clients():
+    return clients_cache.get()
 
-def update_client(client_id, name, phone, address, email):
-    conn = connect_db()
-    cursor = conn.cursor()
+def get_clients_registry():
+    return clients_cache.registry()
 
-    cursor.execute("""
-        UPDATE clients
-        SET name = ?, phone = ?, address = ?, email = ?
-        WHERE id = ?
-    """, (name, phone, address, email, client_id))
+def _build_clients_prefix_index(clients):
+    return PrefixIndex(clients, name_fields=(1,), phone_fields=(2,))
 
-    conn.commit()
-    conn.close()
+def get_clients_prefix_index():
+    # Name/phone prefix index for typeahead pickers, rebuilt with the cache
+    return clients_cache.derived(_build_clients_prefix_index)
 
+@instrumented
+def update_client(client_id, name, phone, address, email):
+    with transaction() as cursor:
+        cursor.execute("""
+            UPDATE clients
+            SET name = ?, phone = ?, address = ?, email = ?
+            WHERE id = ?
+        """, (name, phone, address, email, client_id))
+    clients_cache.invalidate()
+
+@instrumented
 def delete_client(client_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM clients WHERE id = ?", (client_id,))
-
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM clients WHERE id = ?", (client_id,))
+    clients_cache.invalidate()
 
 
 #CRUD Service items
 
+@instrumented
 def insert_item(name, price, notes):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO service_items (name, price, notes)
-        VALUES (?, ?, ?)
-    """, (name, price, notes))
-
-    conn.commit()
-    conn.close()
-
+    with transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO service_items (name, price, notes)
+            VALUES (?, ?, ?)
+        """, (name, price, notes))
+    items_cache.invalidate()
+
+@instrumented
 def get_all_items():
-    conn = connect_db()
-    cursor = conn.cursor()
+    with read_cursor() as cursor:
+        cursor.execute("SELECT id, name, price, notes FROM service_items")
+        return cursor.fetchall()
 
-    cursor.execute("SELECT id, name, price, notes FROM service_items")
-    items = cursor.fetchall()
+# Shared snapshot of get_all_items, reloaded only after an item write
+items_cache = ReferenceCache(get_all_items)
 
-    conn.close()
-    return items
+def get_cached_items():
+    return items_cache.get()
 
-def update_item(item_id, name, price, notes):
-    conn = connect_db()
-    cursor = conn.cursor()
+def get_items_registry():
+    return items_cache.registry()
 
-    cursor.execute("""
-        UPDATE service_items
-        SET name = ?, price = ?, notes = ?
-        WHERE id = ?
-    """, (name, price, notes, item_id))
+def _build_items_prefix_index(items):
+    return PrefixIndex(items, name_fields=(1,))
 
-    conn.commit()
-    conn.close()
+def get_items_prefix_index():
+    return items_cache.derived(_build_items_prefix_index)
 
+@instrumented
+def update_item(item_id, name, price, notes):
+    with transaction() as cursor:
+        cursor.execute("""
+            UPDATE service_items
+            SET name = ?, price = ?, notes = ?
+            WHERE id = ?
+        """, (name, price, notes, item_id))
+    items_cache.invalidate()
+
+@instrumented
 def delete_item(item_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM service_items WHERE id = ?", (item_id,))
-
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM service_items WHERE id = ?", (item_id,))
+    items_cache.invalidate()
 
 
 #CRUD Orders
+@instrumented
 def insert_order(client_id, date, status, fulfillment_method, notes, completion_date=None):
-    conn = connect_db()
-    cursor = conn.cursor()
+    with transaction() as cursor:
+        cursor.execute("""
+                       INSERT INTO orders (client_id, date, status, fulfillment_method, notes, completion_date)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       """, (client_id, date, status, fulfillment_method, notes, completion_date))
 
-    cursor.execute("""
-                   INSERT INTO orders (client_id, date, status, fulfillment_method, notes, completion_date)
-                   VALUES (?, ?, ?, ?, ?, ?)
-                   """, (client_id, date, status, fulfillment_method, notes, completion_date))
-
-    order_id = cursor.lastrowid  # 🔥 IMPORTANTE: pegar o ID da ordem inserida
-
-    conn.commit()
-    conn.close()
-    return order_id  # 🔥 RETORNAR o ID
+        return cursor.lastrowid  # 🔥 RETORNAR o ID da ordem inserida
 
+@instrumented
 def get_all_orders():
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id, client_id, date, status, fulfillment_method, notes, completion_date
-        FROM orders
-    """)
-    orders = cursor.fetchall()
-
-    conn.close()
+    with read_cursor() as cursor:
+        cursor.execute("""
+            SELECT id, client_id, date, status, fulfillment_method, notes, completion_date
+            FROM orders
+        """)
+        return cursor.fetchall()
+
+@instrumented
+def get_orders_filtered(client_id=None, status=None, date_from=None, date_to=None, limit=None, offset=0,
+                        after=None, before=None, search=None):
+    # Same columns as get_all_orders plus client name and order total
+    # (orders.total, kept up to date by triggers on order_items).
+    # Filters are optional; dates are ISO strings (YYYY-MM-DD), inclusive.
+    # search matches order notes or the client (full-text, prefix).
+    # after/before take a (date, id) key for keyset pagination: rows come
+    # back ordered by (date, id), the page right after/before that key.
+    conditions, params = _order_filter_conditions(client_id, status, date_from, date_to, search)
+    if after is not None:
+        conditions.append("(o.date, o.id) > (?, ?)")
+        params += list(after)
+    if before is not None:
+        conditions.append("(o.date, o.id) < (?, ?)")
+        params += list(before)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = "DESC" if before is not None else "ASC"
+
+    query = f"""
+        SELECT o.id, o.client_id, o.date, o.status, o.fulfillment_method, o.notes, o.completion_date,
+               c.name, o.total
+        FROM orders o
+        LEFT JOIN clients c ON c.id = o.client_id
+        {where}
+        ORDER BY o.date {direction}, o.id {direction}
+    """
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+    with read_cursor() as cursor:
+        cursor.execute(query, params)
+        orders = cursor.fetchall()
+
+    if before is not None:
+        orders.reverse()
     return orders
 
+@instrumented
+def get_order_status_totals(client_id=None, status=None, date_from=None, date_to=None, search=None):
+    # (status, order count, total value) per status for the given filters
+    conditions, params = _order_filter_conditions(client_id, status, date_from, date_to, search)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with read_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT o.status, COUNT(*), COALESCE(SUM(o.total), 0)
+            FROM orders o
+            {where}
+            GROUP BY o.status
+        """, params)
+        return cursor.fetchall()
+
+def _order_filter_conditions(client_id=None, status=None, date_from=None, date_to=None, search=None):
+    # WHERE conditions and parameters for the order filters (orders aliased "o")
+    conditions = []
+    params = []
+
+    if client_id is not None:
+        conditions.append("o.client_id = ?")
+        params.append(client_id)
+    if status is not None:
+        conditions.append("o.status = ?")
+        params.append(status)
+    if date_from is not None:
+        conditions.append("o.date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("o.date <= ?")
+        params.append(date_to)
+    if search:
+        _add_order_search(conditions, params, search)
+    return conditions, params
+
+def _add_order_search(conditions, params, search):
+    # Orders whose notes or client match the full-text query
+    query = _fts_query(search)
+    if query is None:
+        return
+    conditions.append("""(o.id IN (SELECT rowid FROM orders_fts WHERE orders_fts MATCH ?)
+                          OR o.client_id IN (SELECT rowid FROM clients_fts WHERE clients_fts MATCH ?))""")
+    params += [query, query]
+
+@instrumented
+def count_order_export_lines(client_id=None, status=None, date_from=None, date_to=None, search=None):
+    # Number of rows iter_order_export_lines yields for the same filters
+    conditions, params = _order_filter_conditions(client_id, status, date_from, date_to, search)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with read_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM orders o
+            LEFT JOIN order_items oi ON oi.order_id = o.id
+            {where}
+        """, params)
+        return cursor.fetchone()[0]
+
+def iter_order_export_lines(client_id=None, status=None, date_from=None, date_to=None, search=None,
+                            batch_size=500):
+    # One row per order line (orders without lines yield one row with empty
+    # item columns): (order id, date, status, fulfillment_method,
+    # completion_date, client name, phone, email, item name, quantity,
+    # unit_price, order total, notes), ordered by (date, id, line id).
+    # Rows are streamed from the cursor in batches, so memory stays constant;
+    # consume the generator on the thread that created it.
+    conditions, params = _order_filter_conditions(client_id, status, date_from, date_to, search)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with read_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT o.id, o.date, o.status, o.fulfillment_method, o.completion_date,
+                   c.name, c.phone, c.email,
+                   i.name, oi.quantity, oi.unit_price, o.total, o.notes
+            FROM orders o
+            LEFT JOIN clients c ON c.id = o.client_id
+            LEFT JOIN order_items oi ON oi.order_id = o.id
+            LEFT JOIN service_items i ON i.id = oi.item_id
+            {where}
+            ORDER BY o.date, o.id, oi.id
+        """, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+
+@instrumented
 def update_order(order_id, client_id, date, status, fulfillment_method, notes, completion_date=None):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        UPDATE orders
-        SET client_id = ?, date = ?, status = ?, fulfillment_method = ?, notes = ?, completion_date = ?
-        WHERE id = ?
-    """, (client_id, date, status, fulfillment_method, notes, completion_date, order_id))
-
-    conn.commit()
-    conn.close()
-
+    with transaction() as cursor:
+        cursor.execute("""
+            UPDATE orders
+            SET client_id = ?, date = ?, status = ?, fulfillment_method = ?, notes = ?, completion_date = ?
+            WHERE id = ?
+        """, (client_id, date, status, fulfillment_method, notes, completion_date, order_id))
+
+@instrumented
 def delete_order(order_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM orders WHERE id = ?", (order_id,))
-
-    conn.commit()
-    conn.close()
+    # order_items rows go with it (ON DELETE CASCADE)
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+
+@instrumented
+def delete_orders(order_ids):
+    # Bulk delete in one statement and one transaction; lines cascade
+    with transaction() as cursor:
+        cursor.execute(
+            "DELETE FROM orders WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps([int(order_id) for order_id in order_ids]),)
+        )
+        return cursor.rowcount
+
+def _diff_order_lines(stored, lines):
+    # Minimal changes turning the stored order_items rows into the edited
+    # lines. stored: (id, item_id, quantity, unit_price) rows; lines:
+    # (line_id, item_id, quantity, unit_price) with line_id None for new ones.
+    stored_by_id = {row[0]: row for row in stored}
+    kept = set()
+    inserts, updates = [], []
+
+    for line_id, item_id, quantity, unit_price in lines:
+        row = stored_by_id.get(line_id)
+        if row is None or line_id in kept:
+            inserts.append((item_id, quantity, unit_price))
+            continue
+
+        kept.add(line_id)
+        if (row[1], row[2], row[3]) != (item_id, quantity, unit_price):
+            updates.append((item_id, quantity, unit_price, line_id))
+
+    deletes = [(line_id,) for line_id in stored_by_id if line_id not in kept]
+    return inserts, updates, deletes
+
+@instrumented
+def save_order_with_items(order_id, client_id, date, status, fulfillment_method, notes, items, completion_date=None):
+    # Header and lines in one transaction: all or nothing, a single commit.
+    # order_id=None creates a new order; otherwise only the lines that
+    # changed are inserted, updated or deleted (existing rows keep their id).
+    # items: iterable of (line_id, item_id, quantity, unit_price), where
+    # line_id is the order_items id, or None for a new line.
+    with transaction() as cursor:
+        if order_id is None:
+            cursor.execute("""
+                INSERT INTO orders (client_id, date, status, fulfillment_method, notes, completion_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (client_id, date, status, fulfillment_method, notes, completion_date))
+            order_id = cursor.lastrowid
+            stored = []
+        else:
+            cursor.execute("""
+                UPDATE orders
+                SET client_id = ?, date = ?, status = ?, fulfillment_method = ?, notes = ?, completion_date = ?
+                WHERE id = ?
+            """, (client_id, date, status, fulfillment_method, notes, completion_date, order_id))
+            cursor.execute("""
+                SELECT id, item_id, quantity, unit_price
+                FROM order_items
+                WHERE order_id = ?
+            """, (order_id,))
+            stored = cursor.fetchall()
+
+        inserts, updates, deletes = _diff_order_lines(stored, items)
+
+        if deletes:
+            cursor.executemany("DELETE FROM order_items WHERE id = ?", deletes)
+        if updates:
+            cursor.executemany("""
+                UPDATE order_items
+                SET item_id = ?, quantity = ?, unit_price = ?
+                WHERE id = ?
+            """, updates)
+        if inserts:
+            cursor.executemany("""
+                INSERT INTO order_items (order_id, item_id, quantity, unit_price)
+                VALUES (?, ?, ?, ?)
+            """, [(order_id, item_id, quantity, unit_price) for item_id, quantity, unit_price in inserts])
+
+    return order_id
 
 
 #CRUD Order_items
+@instrumented
 def insert_order_item(order_id, item_id, quantity, unit_price):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    print(f"INSERT: order_id={order_id}, item_id={item_id}, quantity={quantity}, unit_price={unit_price}")  # Debug
-
-    cursor.execute("""
-        INSERT INTO order_items (order_id, item_id, quantity, unit_price)
-        VALUES (?, ?, ?, ?)
-    """, (order_id, item_id, quantity, unit_price))
-
-    conn.commit()
-    conn.close()
-    print("Item inserido com sucesso!")  # Debug
+    with transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO order_items (order_id, item_id, quantity, unit_price)
+            VALUES (?, ?, ?, ?)
+        """, (order_id, item_id, quantity, unit_price))
 
 
+@instrumented
 def get_order_items(order_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-                   SELECT id, item_id, quantity, unit_price
-                   FROM order_items
-                   WHERE order_id = ?
-                   """, (order_id,))
-
-    items = cursor.fetchall()
+    with read_cursor() as cursor:
+        cursor.execute("""
+                       SELECT id, item_id, quantity, unit_price
+                       FROM order_items
+                       WHERE order_id = ?
+                       ORDER BY id
+                       """, (order_id,))
 
-    # Debug: verificar o que está sendo retornado
-    print(f"=== GET_ORDER_ITEMS para ordem {order_id} ===")
-    for item in items:
-        print(f"ID: {item[0]}, Item_ID: {item[1]}, Qtd: {item[2]}, Preço: {item[3]}")
-
-    conn.close()
-    return items
+        return cursor.fetchall()
 
+@instrumented
 def update_order_item(item_id, quantity, unit_price):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        UPDATE order_items
-        SET quantity = ?, unit_price = ?
-        WHERE id = ?
-    """, (quantity, unit_price, item_id))
-
-    conn.commit()
-    conn.close()
-
+    with transaction() as cursor:
+        cursor.execute("""
+            UPDATE order_items
+            SET quantity = ?, unit_price = ?
+            WHERE id = ?
+        """, (quantity, unit_price, item_id))
+
+@instrumented
 def delete_order_item(item_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM order_items WHERE id = ?", (item_id,))
-
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM order_items WHERE id = ?", (item_id,))
 
 
 #CRUD accounts
-def insert_account(name, amount, due_date, recurring, paid):
-    conn = connect_db()
-    cursor = conn.cursor()
-
+@instrumented
+def insert_account(name, amount, due_date, recurring, paid, recurrence="monthly"):
+    # A recurring account starts its own series (see utils.recurrence)
+    with transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO accounts (name, amount, due_date, recurring, paid)
+            VALUES (?, ?, ?, ?, ?)
+        """, (name, amount, due_date, recurring, paid))
+        account_id = cursor.lastrowid
+        if recurring:
+            _set_account_recurrence(cursor, account_id, recurrence)
+        return account_id
+
+def _set_account_recurrence(cursor, account_id, recurrence):
+    # Makes a standalone account (or a series template) the template of a
+    # series with the given rule; None stops generating new occurrences.
+    # A newly enabled series starts after today, so an old account does not
+    # backfill past-due occurrences. Occurrences of another series are left alone.
     cursor.execute("""
-        INSERT INTO accounts (name, amount, due_date, recurring, paid)
-        VALUES (?, ?, ?, ?, ?)
-    """, (name, amount, due_date, recurring, paid))
-
-    conn.commit()
-    conn.close()
-
+        UPDATE accounts
+        SET recurrence = ?,
+            series_id = CASE WHEN ? IS NULL THEN series_id ELSE id END,
+            generated_until = CASE
+                WHEN ? IS NOT NULL AND recurrence IS NULL
+                THEN MAX(COALESCE(generated_until, due_date), ?)
+                ELSE generated_until
+            END
+        WHERE id = ? AND (series_id IS NULL OR series_id = id)
+    """, (recurrence, recurrence, recurrence, to_iso(date.today()), account_id))
+
+@instrumented
 def get_all_accounts():
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id, name, amount, due_date, recurring, paid
+    with read_cursor() as cursor:
+        cursor.execute("""
+            SELECT id, name, amount, due_date, recurring, paid, recurrence
+            FROM accounts
+        """)
+        return cursor.fetchall()
+
+@instrumented
+def get_accounts_filtered(paid=None, due_from=None, due_to=None, status=None, today=None,
+                          limit=None, after=None, before=None):
+    # Accounts ordered by (due_date, id); dates are ISO strings, inclusive.
+    # status ("Pago", "Atrasado", "Pendente") is computed here against today
+    # (ISO, defaults to the current date) and returned as the last column.
+    # after/before take a (due_date, id) key for keyset pagination.
+    today = today or to_iso(date.today())
+    conditions, params = _account_filter_conditions(today, paid, due_from, due_to, status)
+    if after is not None:
+        conditions.append("(due_date, id) > (?, ?)")
+        params += list(after)
+    if before is not None:
+        conditions.append("(due_date, id) < (?, ?)")
+        params += list(before)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = "DESC" if before is not None else "ASC"
+
+    query = f"""
+        SELECT id, name, amount, due_date, recurring, paid, recurrence,
+               {_ACCOUNT_STATUS_SQL}
         FROM accounts
-    """)
-    accounts = cursor.fetchall()
-
-    conn.close()
+        {where}
+        ORDER BY due_date {direction}, id {direction}
+    """
+    params = [today] + params
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    with read_cursor() as cursor:
+        cursor.execute(query, params)
+        accounts = cursor.fetchall()
+
+    if before is not None:
+        accounts.reverse()
     return accounts
 
-def update_account(account_id, name, amount, due_date, recurring, paid):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        UPDATE accounts
-        SET name = ?, amount = ?, due_date = ?, recurring = ?, paid = ?
-        WHERE id = ?
-    """, (name, amount, due_date, recurring, paid, account_id))
-
-    conn.commit()
-    conn.close()
-
+# Takes today (ISO) as its only parameter
+_ACCOUNT_STATUS_SQL = """CASE WHEN paid <> 0 THEN 'Pago'
+                    WHEN due_date < ? THEN 'Atrasado'
+                    ELSE 'Pendente' END"""
+
+def _account_filter_conditions(today, paid=None, due_from=None, due_to=None, status=None):
+    # WHERE conditions and parameters for the account filters. "paid = 0"
+    # is written as a literal so the planner can use the partial index on
+    # unpaid accounts (it cannot prove a bound parameter is 0).
+    conditions = []
+    params = []
+
+    if paid is not None:
+        conditions.append("paid = 1" if paid else "paid = 0")
+    if status == "Pago":
+        conditions.append("paid = 1")
+    elif status == "Atrasado":
+        conditions.append("paid = 0 AND due_date < ?")
+        params.append(today)
+    elif status == "Pendente":
+        conditions.append("paid = 0 AND due_date >= ?")
+        params.append(today)
+    if due_from is not None:
+        conditions.append("due_date >= ?")
+        params.append(due_from)
+    if due_to is not None:
+        conditions.append("due_date <= ?")
+        params.append(due_to)
+    return conditions, params
+
+@instrumented
+def get_account_totals(today, paid=None, due_from=None, due_to=None, status=None):
+    # Counts and sums over the filtered accounts, split into paid, pending
+    # and overdue (unpaid and due before today, an ISO date). The overdue
+    # part is a separate range scan on the unpaid accounts index.
+    conditions, params = _account_filter_conditions(today, paid, due_from, due_to, status)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    overdue_where = " AND ".join(conditions + ["paid = 0 AND due_date < ?"])
+
+    with read_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*),
+                   COALESCE(SUM(amount), 0),
+                   COALESCE(SUM(paid <> 0), 0),
+                   COALESCE(SUM(CASE WHEN paid <> 0 THEN amount END), 0)
+            FROM accounts
+            {where}
+        """, params)
+        totals = cursor.fetchone()
+
+        cursor.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(amount), 0)
+            FROM accounts
+            WHERE {overdue_where}
+        """, params + [today])
+        return totals + cursor.fetchone()
+
+@instrumented
+def update_account(account_id, name, amount, due_date, recurring, paid, recurrence="monthly"):
+    with transaction() as cursor:
+        cursor.execute("""
+            UPDATE accounts
+            SET name = ?, amount = ?, due_date = ?, recurring = ?, paid = ?
+            WHERE id = ?
+        """, (name, amount, due_date, recurring, paid, account_id))
+        _set_account_recurrence(cursor, account_id, recurrence if recurring else None)
+
+@instrumented
+def mark_account_paid(account_id):
+    # Returns the number of accounts updated (0 if the id does not exist)
+    with transaction() as cursor:
+        cursor.execute("UPDATE accounts SET paid = 1 WHERE id = ?", (account_id,))
+        return cursor.rowcount
+
+@instrumented
 def delete_account(account_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
-
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
+
+#Aggregates
+@instrumented
+def get_payables_by_month(due_from=None, due_to=None):
+    # (YYYY-MM, total amount, unpaid amount) of accounts per due month
+    conditions = []
+    params = []
+
+    if due_from is not None:
+        conditions.append("due_date >= ?")
+        params.append(due_from)
+    if due_to is not None:
+        conditions.append("due_date <= ?")
+        params.append(due_to)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with read_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT substr(due_date, 1, 7) AS month,
+                   COALESCE(SUM(amount), 0),
+                   COALESCE(SUM(CASE WHEN paid = 0 THEN amount END), 0)
+            FROM accounts
+            {where}
+            GROUP BY month
+            ORDER BY month
+        """, params)
+        return cursor.fetchall()
+
+#Search
+def _fts_query(text):
+    # User text -> FTS5 query: every word must match as a prefix ("jo sil" finds
+    # "João Silva"). Words are quoted so FTS operators typed by the user are inert.
+    terms = re.findall(r"\w+", text or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+@instrumented
+def search_clients(text, limit=50):
+    # Best matches first (bm25, a hit in the name weighs more than elsewhere)
+    query = _fts_query(text)
+    if query is None:
+        return []
+    with read_cursor() as cursor:
+        cursor.execute("""
+            SELECT c.id, c.name, c.phone, c.address, c.email
+            FROM clients_fts
+            JOIN clients c ON c.id = clients_fts.rowid
+            WHERE clients_fts MATCH ?
+            ORDER BY bm25(clients_fts, 10.0, 5.0, 1.0, 1.0)
+            LIMIT ?
+        """, (query, limit))
+        return cursor.fetchall()
+
+@instrumented
+def search_items(text, limit=50):
+    query = _fts_query(text)
+    if query is None:
+        return []
+    with read_cursor() as cursor:
+        cursor.execute("""
+            SELECT i.id, i.name, i.price, i.notes
+            FROM service_items_fts
+            JOIN service_items i ON i.id = service_items_fts.rowid
+            WHERE service_items_fts MATCH ?
+            ORDER BY bm25(service_items_fts, 10.0, 1.0)
+            LIMIT ?
+        """, (query, limit))
+        return cursor.fetchall()
+
+@instrumented
+def search_orders(text, limit=50):
+    # Orders by relevance of their notes; same columns as get_orders_filtered
+    query = _fts_query(text)
+    if query is None:
+        return []
+    with read_cursor() as cursor:
+        cursor.execute("""
+            SELECT o.id, o.client_id, o.date, o.status, o.fulfillment_method, o.notes, o.completion_date,
+                   c.name, o.total
+            FROM orders_fts
+            JOIN orders o ON o.id = orders_fts.rowid
+            LEFT JOIN clients c ON c.id = o.client_id
+            WHERE orders_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (query, limit))
+        return cursor.fetchall()
@@ -0,0 +1,177 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DbWorker:
+    """Runs database calls off the Tk thread and delivers results back to it.
+
+    submit() queues a call for the worker thread; results go to a queue
+    that is drained with root.after(), so callbacks always run on the Tk
+    thread. Requests sharing a key supersede each other: only the latest
+    one is executed/delivered. While anything is pending the window shows
+    a busy cursor. Each worker thread gets its own pooled connection.
+    """
+
+    def __init__(self, root, threads=1, poll_ms=20):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._calls = queue.Queue()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pending = 0
+        self._polling = False
+
+        # A single thread (default) also keeps writes in submission order
+        self._threads = [
+            threading.Thread(target=self._run, name=f"db-worker-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, *args, on_success=None, on_error=None, key=None, **kwargs):
+        """Queue func(*args, **kwargs); call on_success(result) or on_error(exc) on the Tk thread."""
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            if key is not None:
+                self._latest[key] = seq
+
+        self._pending += 1
+        self._tasks.put((seq, key, func, args, kwargs, on_success, on_error))
+        self._set_busy(True)
+        self._schedule_poll()
+        return seq
+
+    def submit_write(self, widgets, func, *args, on_success=None, on_error=None, **kwargs):
+        """Like submit(), with widgets (action buttons) disabled until the
+        write finishes, so a double click cannot submit it twice."""
+        def finish(callback, value, is_error):
+            for widget in widgets:
+                if widget.winfo_exists():
+                    widget.configure(state="normal")
+            if callback is not None:
+                callback(value)
+            elif is_error:
+                logger.error("Error in %s", getattr(func, "__name__", func), exc_info=value)
+
+        for widget in widgets:
+            widget.configure(state="disabled")
+        return self.submit(
+            func, *args,
+            on_success=lambda result: finish(on_success, result, False),
+            on_error=lambda exc: finish(on_error, exc, True),
+            **kwargs
+        )
+
+    def call_soon(self, func, *args):
+        """Run func(*args) on the Tk thread; safe to call from the worker,
+        e.g. to report progress of a long task."""
+        self._calls.put((func, args))
+
+    def cancel(self, key):
+        """Drop any queued or running request submitted with key."""
+        with self._lock:
+            self._latest.pop(key, None)
+
+    def shutdown(self, timeout=2.0):
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _is_current(self, seq, key):
+        with self._lock:
+            return key is None or self._latest.get(key) == seq
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+
+            seq, key, func, args, kwargs, _, _ = task
+            if not self._is_current(seq, key):
+                self._results.put((task, None, None, True))
+                continue
+
+            try:
+                self._results.put((task, func(*args, **kwargs), None, False))
+            except Exception as exc:
+                self._results.put((task, None, exc, False))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+
+        while True:
+            try:
+                func, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception:
+                logger.exception("Error in %s", getattr(func, "__name__", func))
+
+        while True:
+            try:
+                task, result, error, skipped = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pending -= 1
+            seq, key, func, _, _, on_success, on_error = task
+            if skipped or not self._is_current(seq, key):
+                continue
+
+            try:
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                    else:
+                        logger.error("Error in %s", getattr(func, "__name__", func), exc_info=error)
+                elif on_success is not None:
+                    on_success(result)
+            except Exception:
+                logger.exception("Error in callback for %s", getattr(func, "__name__", func))
+
+        if self._pending:
+            self._schedule_poll()
+        else:
+            self._set_busy(False)
+
+    def _set_busy(self, busy):
+        try:
+            self.root.configure(cursor="watch" if busy else "")
+        except Exception:
+            pass  # window already destroyed
+
+
+_workers = {}
+
+
+def get_worker(widget, name="default"):
+    """Shared worker bound to the widget's top-level window.
+
+    Long jobs (exports) use their own named worker so they do not hold up
+    the page loads and writes queued on the default one.
+    """
+    if name not in _workers:
+        _workers[name] = DbWorker(widget.winfo_toplevel())
+    return _workers[name]
+
+
+def shutdown_worker():
+    while _workers:
+        _workers.popitem()[1].shutdown()
@@ -0,0 +1,34 @@
+class EntityRegistry:
+    """In-memory indexes over (id, name, ...) rows of clients or items.
+
+    id -> row and name -> id, so views resolve references in O(1) instead
+    of scanning the whole list for every rendered line.
+    """
+
+    def __init__(self, rows, name_index=1):
+        self.rows = rows
+        self.by_id = {row[0]: row for row in rows}
+        self.id_by_name = {}
+        for row in rows:
+            # On duplicate names the first row wins, as with the old linear scan
+            self.id_by_name.setdefault(row[name_index], row[0])
+        self._name_index = name_index
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.by_id
+
+    def get(self, entity_id, default=None):
+        return self.by_id.get(entity_id, default)
+
+    def name(self, entity_id, default="Desconhecido"):
+        row = self.by_id.get(entity_id)
+        return row[self._name_index] if row else default
+
+    def id_for_name(self, name):
+        return self.id_by_name.get(name)
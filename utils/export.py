@@ -0,0 +1,102 @@
+import csv
+import logging
+
+from utils.date_utils import iso_to_br, parse_date
+from utils.db_utils import count_order_export_lines, iter_order_export_lines
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = [
+    "Ordem", "Data", "Status", "Entrega", "Conclusão",
+    "Cliente", "Telefone", "Email",
+    "Item", "Quantidade", "Preço Unitário", "Subtotal", "Total da Ordem", "Observações",
+]
+
+# Report progress every this many rows
+PROGRESS_EVERY = 500
+
+
+def _export_rows(filters, progress):
+    """Stream export rows (one per order line) and report (done, total)."""
+    total = count_order_export_lines(**filters)
+    if progress:
+        progress(0, total)
+
+    done = 0
+    for (order_id, date, status, method, completion, client, phone, email,
+         item, quantity, unit_price, order_total, notes) in iter_order_export_lines(**filters):
+        subtotal = quantity * unit_price if quantity is not None and unit_price is not None else None
+        yield (order_id, date, status, method, completion, client, phone, email,
+               item, quantity, unit_price, subtotal, order_total, notes)
+
+        done += 1
+        if progress and done % PROGRESS_EVERY == 0:
+            progress(done, total)
+
+    if progress:
+        progress(done, total)
+
+
+def _decimal_br(value):
+    return "" if value is None else f"{value:.2f}".replace(".", ",")
+
+
+def export_orders_csv(path, filters, progress=None):
+    """Write the filtered orders with their lines to a CSV file.
+
+    Semicolon separated, BR dates and decimal commas, UTF-8 with BOM, which
+    is what Excel in pt-BR opens directly. Returns the number of rows.
+    """
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(EXPORT_COLUMNS)
+        for row in _export_rows(filters, progress):
+            (order_id, date, status, method, completion, client, phone, email,
+             item, quantity, unit_price, subtotal, order_total, notes) = row
+            writer.writerow([
+                order_id, iso_to_br(date), status, method, iso_to_br(completion),
+                client or "", phone or "", email or "",
+                item or "", "" if quantity is None else quantity,
+                _decimal_br(unit_price), _decimal_br(subtotal), _decimal_br(order_total),
+                notes or "",
+            ])
+            count += 1
+    return count
+
+
+def export_orders_xlsx(path, filters, progress=None):
+    """Write the filtered orders with their lines to an XLSX file.
+
+    Uses an openpyxl write-only workbook, which streams rows to disk
+    instead of keeping the sheet in memory. Requires openpyxl (ImportError
+    otherwise). Returns the number of rows.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Ordens")
+    sheet.append(EXPORT_COLUMNS)
+
+    count = 0
+    for row in _export_rows(filters, progress):
+        (order_id, date, status, method, completion, client, phone, email,
+         item, quantity, unit_price, subtotal, order_total, notes) = row
+        sheet.append([
+            order_id, parse_date(date), status, method, parse_date(completion),
+            client, phone, email, item, quantity, unit_price, subtotal, order_total, notes,
+        ])
+        count += 1
+
+    workbook.save(path)
+    return count
+
+
+def export_orders(path, filters, progress=None):
+    """Export to CSV or XLSX depending on the file extension."""
+    if path.lower().endswith(".xlsx"):
+        count = export_orders_xlsx(path, filters, progress)
+    else:
+        count = export_orders_csv(path, filters, progress)
+    logger.info("Exported %d rows to %s", count, path)
+    return count
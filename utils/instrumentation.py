@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from functools import wraps
+
+# Loggers are silent unless the application configures logging:
+# logging.basicConfig(level=logging.DEBUG) shows every query,
+# enable_slow_query_log() writes the slow ones to a file.
+logger = logging.getLogger("servico_facil.db")
+slow_logger = logging.getLogger("servico_facil.db.slow")
+logger.addHandler(logging.NullHandler())
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_slow_query_threshold_ms = 100.0
+_stats = {}
+_lock = threading.Lock()
+
+
+def set_slow_query_threshold(ms):
+    global _slow_query_threshold_ms
+    _slow_query_threshold_ms = float(ms)
+
+
+def enable_slow_query_log(path, threshold_ms=None):
+    """Append calls slower than the threshold to a log file."""
+    if threshold_ms is not None:
+        set_slow_query_threshold(threshold_ms)
+
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_logger.addHandler(handler)
+    slow_logger.setLevel(logging.WARNING)
+    return handler
+
+
+def _count_rows(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def _record(name, elapsed_ms, rows, failed):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {
+                "calls": 0,
+                "errors": 0,
+                "rows": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "histogram": [0] * len(HISTOGRAM_BUCKETS_MS),
+            }
+
+        stats["calls"] += 1
+        stats["errors"] += failed
+        stats["rows"] += rows
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                stats["histogram"][i] += 1
+                break
+
+
+def instrumented(func):
+    """Record call count, latency and rows returned for a db_utils function."""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        failed = False
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            rows = _count_rows(result)
+            _record(name, elapsed_ms, rows, failed)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s args=%r kwargs=%r rows=%d %.2f ms", name, args, kwargs, rows, elapsed_ms)
+            if elapsed_ms >= _slow_query_threshold_ms:
+                slow_logger.warning("SLOW %s %.2f ms rows=%d args=%r kwargs=%r",
+                                    name, elapsed_ms, rows, args, kwargs)
+
+    return wrapper
+
+
+def get_stats():
+    """Snapshot of the collected statistics, keyed by function name."""
+    with _lock:
+        snapshot = {}
+        for name, stats in _stats.items():
+            entry = dict(stats, histogram=list(stats["histogram"]))
+            entry["avg_ms"] = stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+            snapshot[name] = entry
+        return snapshot
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,479 @@
+import logging
+import sqlite3
+from datetime import date
+
+from utils.connection import get_connection, transaction
+from utils.date_utils import to_iso
+
+logger = logging.getLogger(__name__)
+
+# Triggers keeping orders.total in sync with order_items. They re-sum the
+# order's lines (covering index) instead of adding/subtracting deltas, so
+# the REAL total never drifts. Shared by every migration that (re)creates
+# order_items.
+ORDER_TOTAL_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_order_items_total_insert
+    AFTER INSERT ON order_items
+    BEGIN
+        UPDATE orders
+        SET total = (SELECT COALESCE(SUM(quantity * unit_price), 0)
+                     FROM order_items WHERE order_id = NEW.order_id)
+        WHERE id = NEW.order_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_order_items_total_update
+    AFTER UPDATE OF order_id, quantity, unit_price ON order_items
+    BEGIN
+        UPDATE orders
+        SET total = (SELECT COALESCE(SUM(quantity * unit_price), 0)
+                     FROM order_items WHERE order_id = orders.id)
+        WHERE id IN (OLD.order_id, NEW.order_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_order_items_total_delete
+    AFTER DELETE ON order_items
+    BEGIN
+        UPDATE orders
+        SET total = (SELECT COALESCE(SUM(quantity * unit_price), 0)
+                     FROM order_items WHERE order_id = OLD.order_id)
+        WHERE id = OLD.order_id;
+    END
+    """,
+]
+
+
+def _fts_sync_triggers(table, fts, columns):
+    """Triggers keeping an external-content FTS5 table in sync with table."""
+    cols = ", ".join(columns)
+    new = ", ".join(f"NEW.{col}" for col in columns)
+    old = ", ".join(f"OLD.{col}" for col in columns)
+    return [
+        f"""
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.id, {new});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old});
+        END
+        """,
+        # Only the indexed columns: orders.total is rewritten on every line change
+        f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {cols} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.id, {new});
+        END
+        """,
+    ]
+
+
+def _iso_date(value):
+    # SQL function used by version 6 to convert legacy dates while copying
+    return to_iso(value)
+
+
+# (table, column, required) of the dates converted by version 6
+_LEGACY_DATE_COLUMNS = [
+    ("orders", "date", True),
+    ("orders", "completion_date", False),
+    ("accounts", "due_date", True),
+]
+
+
+def _check_legacy_dates(cursor):
+    # Version 6 must not lose data: abort (nothing is changed) listing the
+    # rows whose date cannot be converted, so they can be fixed by hand.
+    invalid = []
+    for table, column, required in _LEGACY_DATE_COLUMNS:
+        for row_id, value in cursor.execute(f"SELECT id, {column} FROM {table}").fetchall():
+            blank = value is None or not str(value).strip()
+            if (required and blank) or (not blank and to_iso(value) is None):
+                invalid.append(f"{table}.{column} id={row_id}: {value!r}")
+
+    if invalid:
+        for line in invalid:
+            logger.error("Data inválida na migração: %s", line)
+        listed = invalid[:20] + ([f"... and {len(invalid) - 20} more"] if len(invalid) > 20 else [])
+        raise sqlite3.IntegrityError(
+            f"Migration 6 found {len(invalid)} invalid or missing dates:\n" + "\n".join(listed)
+        )
+
+
+def _backfill_recurring_series(cursor):
+    # Used by version 9. Before it nothing generated recurring bills, so each
+    # month's bill was entered by hand and flagged recurring: group those rows
+    # by name into one monthly series whose template is the latest row. The
+    # older rows join the series (their dates are taken), and generation
+    # starts after today, never creating past-due bills. Rows repeating a
+    # date already in their series stay standalone (unique index).
+    today = to_iso(date.today())
+    series = {}
+    for account_id, name, due_date in cursor.execute("""
+        SELECT id, name, due_date FROM accounts
+        WHERE recurring <> 0
+        ORDER BY due_date, id
+    """).fetchall():
+        series.setdefault(name.strip().casefold(), []).append((account_id, due_date))
+
+    members = []
+    templates = []
+    for rows in series.values():
+        template_id, template_due = rows[-1]
+        dates = set()
+        for account_id, due_date in rows:
+            if due_date not in dates:
+                dates.add(due_date)
+                members.append((template_id, account_id))
+        templates.append((max(template_due, today), template_id))
+
+    cursor.executemany("UPDATE accounts SET series_id = ? WHERE id = ?", members)
+    cursor.executemany("""
+        UPDATE accounts SET recurrence = 'monthly', generated_until = ?
+        WHERE id = ?
+    """, templates)
+
+
+def _register_iso_date(cursor):
+    cursor.connection.create_function("iso_date", 1, _iso_date, deterministic=True)
+
+
+# Numbered schema versions, tracked in PRAGMA user_version.
+# Each entry is (version, steps); a step is either a SQL statement or a
+# callable receiving the migration cursor. Append new versions at the end,
+# never edit one that has already shipped.
+MIGRATIONS = [
+    (1, [
+        # Base schema (IF NOT EXISTS keeps databases created before the runner)
+        """
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            address TEXT,
+            email TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS service_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price REAL NOT NULL DEFAULT 0,
+            notes TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER REFERENCES clients (id),
+            date TEXT NOT NULL,
+            status TEXT,
+            fulfillment_method TEXT,
+            notes TEXT,
+            completion_date TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL REFERENCES orders (id),
+            item_id INTEGER REFERENCES service_items (id),
+            quantity INTEGER NOT NULL DEFAULT 1,
+            unit_price REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0,
+            due_date TEXT,
+            recurring INTEGER NOT NULL DEFAULT 0,
+            paid INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (2, [
+        # Covering index for get_order_items and per-order totals
+        """
+        CREATE INDEX IF NOT EXISTS idx_order_items_order
+        ON order_items (order_id, item_id, quantity, unit_price)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_orders_client_date ON orders (client_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_status_date ON orders (status, date)",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_paid_due ON accounts (paid, due_date)",
+    ]),
+    (3, [
+        # Keyset pagination order: (date, id) and (due_date, id)
+        "CREATE INDEX IF NOT EXISTS idx_orders_date ON orders (date)",
+        "CREATE INDEX IF NOT EXISTS idx_accounts_due ON accounts (due_date)",
+    ]),
+    (4, [
+        # Denormalized order total, kept in sync by triggers on order_items
+        "ALTER TABLE orders ADD COLUMN total REAL NOT NULL DEFAULT 0",
+        *ORDER_TOTAL_TRIGGERS,
+        # One-time backfill for existing orders
+        """
+        UPDATE orders
+        SET total = (SELECT COALESCE(SUM(quantity * unit_price), 0)
+                     FROM order_items WHERE order_id = orders.id)
+        """,
+    ]),
+    (5, [
+        # Rebuild orders/order_items with enforced foreign keys: deleting an
+        # order cascades to its lines; deleting a client or service item
+        # keeps history and just clears the reference. Dangling references
+        # are cleared and orphaned lines (left by old deletes) are dropped.
+        """
+        CREATE TABLE orders_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER REFERENCES clients (id) ON DELETE SET NULL,
+            date TEXT NOT NULL,
+            status TEXT,
+            fulfillment_method TEXT,
+            notes TEXT,
+            completion_date TEXT,
+            total REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO orders_new (id, client_id, date, status, fulfillment_method, notes, completion_date, total)
+        SELECT id,
+               CASE WHEN client_id IN (SELECT id FROM clients) THEN client_id END,
+               date, status, fulfillment_method, notes, completion_date, total
+        FROM orders
+        """,
+        """
+        CREATE TABLE order_items_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+            item_id INTEGER REFERENCES service_items (id) ON DELETE SET NULL,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            unit_price REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO order_items_new (id, order_id, item_id, quantity, unit_price)
+        SELECT id, order_id,
+               CASE WHEN item_id IN (SELECT id FROM service_items) THEN item_id END,
+               quantity, unit_price
+        FROM order_items
+        WHERE order_id IN (SELECT id FROM orders)
+        """,
+        "DROP TABLE order_items",
+        "DROP TABLE orders",
+        "ALTER TABLE orders_new RENAME TO orders",
+        "ALTER TABLE order_items_new RENAME TO order_items",
+        """
+        CREATE INDEX idx_order_items_order
+        ON order_items (order_id, item_id, quantity, unit_price)
+        """,
+        "CREATE INDEX idx_orders_client_date ON orders (client_id, date)",
+        "CREATE INDEX idx_orders_status_date ON orders (status, date)",
+        "CREATE INDEX idx_orders_date ON orders (date)",
+        *ORDER_TOTAL_TRIGGERS,
+        # Totals of orders that had orphaned/dangling lines
+        """
+        UPDATE orders
+        SET total = (SELECT COALESCE(SUM(quantity * unit_price), 0)
+                     FROM order_items WHERE order_id = orders.id)
+        """,
+    ]),
+    (6, [
+        # ISO dates everywhere, enforced by CHECK constraints (valid calendar
+        # dates only), so date filters and sorts are plain index range scans.
+        # Legacy DD/MM/YYYY or unpadded values are converted while copying;
+        # if any value cannot be converted (or a required date is missing)
+        # the migration aborts instead of clearing it.
+        _check_legacy_dates,
+        _register_iso_date,
+        "DROP TRIGGER trg_order_items_total_insert",
+        "DROP TRIGGER trg_order_items_total_update",
+        "DROP TRIGGER trg_order_items_total_delete",
+        """
+        CREATE TABLE orders_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER REFERENCES clients (id) ON DELETE SET NULL,
+            date TEXT NOT NULL CHECK (date IS date(date)),
+            status TEXT,
+            fulfillment_method TEXT,
+            notes TEXT,
+            completion_date TEXT CHECK (completion_date IS date(completion_date)),
+            total REAL NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO orders_new (id, client_id, date, status, fulfillment_method, notes, completion_date, total)
+        SELECT id, client_id, iso_date(date), status, fulfillment_method, notes,
+               iso_date(completion_date), total
+        FROM orders
+        """,
+        "DROP TABLE orders",
+        "ALTER TABLE orders_new RENAME TO orders",
+        "CREATE INDEX idx_orders_client_date ON orders (client_id, date)",
+        "CREATE INDEX idx_orders_status_date ON orders (status, date)",
+        "CREATE INDEX idx_orders_date ON orders (date)",
+        *ORDER_TOTAL_TRIGGERS,
+        """
+        CREATE TABLE accounts_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0,
+            due_date TEXT NOT NULL CHECK (due_date IS date(due_date)),
+            recurring INTEGER NOT NULL DEFAULT 0,
+            paid INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT INTO accounts_new (id, name, amount, due_date, recurring, paid)
+        SELECT id, name, amount, iso_date(due_date), recurring, paid
+        FROM accounts
+        """,
+        "DROP TABLE accounts",
+        "ALTER TABLE accounts_new RENAME TO accounts",
+        "CREATE INDEX idx_accounts_paid_due ON accounts (paid, due_date)",
+        "CREATE INDEX idx_accounts_due ON accounts (due_date)",
+    ]),
+    (7, [
+        # Full-text search (FTS5, external content) over clients, service
+        # items and order notes. remove_diacritics lets "joao" match "João".
+        """
+        CREATE VIRTUAL TABLE clients_fts USING fts5 (
+            name, phone, address, email,
+            content = 'clients', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE service_items_fts USING fts5 (
+            name, notes,
+            content = 'service_items', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE orders_fts USING fts5 (
+            notes,
+            content = 'orders', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        *_fts_sync_triggers("clients", "clients_fts", ["name", "phone", "address", "email"]),
+        *_fts_sync_triggers("service_items", "service_items_fts", ["name", "notes"]),
+        *_fts_sync_triggers("orders", "orders_fts", ["notes"]),
+        "INSERT INTO clients_fts (clients_fts) VALUES ('rebuild')",
+        "INSERT INTO service_items_fts (service_items_fts) VALUES ('rebuild')",
+        "INSERT INTO orders_fts (orders_fts) VALUES ('rebuild')",
+    ]),
+    (8, [
+        # Change tracking for incremental readers (columnar snapshot): every
+        # insert or update of an order, including total changes made by the
+        # order_items triggers, stamps it with the next row_version. The
+        # counter lives in change_sequence, so it never goes back when the
+        # order holding the highest version is deleted.
+        "ALTER TABLE orders ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0",
+        "UPDATE orders SET row_version = id",
+        "CREATE INDEX idx_orders_row_version ON orders (row_version)",
+        """
+        CREATE TABLE change_sequence (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+        "INSERT INTO change_sequence (name, value) SELECT 'orders', COALESCE(MAX(row_version), 0) FROM orders",
+        """
+        CREATE TRIGGER trg_orders_version_insert AFTER INSERT ON orders
+        BEGIN
+            UPDATE change_sequence SET value = value + 1 WHERE name = 'orders';
+            UPDATE orders SET row_version = (SELECT value FROM change_sequence WHERE name = 'orders')
+            WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_orders_version_update
+        AFTER UPDATE OF client_id, date, status, fulfillment_method, notes, completion_date, total ON orders
+        BEGIN
+            UPDATE change_sequence SET value = value + 1 WHERE name = 'orders';
+            UPDATE orders SET row_version = (SELECT value FROM change_sequence WHERE name = 'orders')
+            WHERE id = NEW.id;
+        END
+        """,
+    ]),
+    (9, [
+        # Recurring accounts: one account of a series is its template
+        # (recurrence rule + how far occurrences were generated); the other
+        # occurrences point to it through series_id. The unique index makes
+        # generation idempotent, the partial one lists only the templates.
+        "ALTER TABLE accounts ADD COLUMN series_id INTEGER REFERENCES accounts (id) ON DELETE SET NULL",
+        """
+        ALTER TABLE accounts ADD COLUMN recurrence TEXT
+            CHECK (recurrence IN ('monthly', 'weekly', 'yearly'))
+        """,
+        "ALTER TABLE accounts ADD COLUMN generated_until TEXT",
+        _backfill_recurring_series,
+        "CREATE UNIQUE INDEX idx_accounts_series_due ON accounts (series_id, due_date)",
+        """
+        CREATE INDEX idx_accounts_recurrence_until ON accounts (generated_until)
+        WHERE recurrence IS NOT NULL
+        """,
+    ]),
+    (10, [
+        # Only unpaid accounts: overdue/pending filters and the overdue
+        # totals become range scans over a small index that does not grow
+        # with the paid history. It replaces (paid, due_date): paid accounts
+        # are most of the table, so idx_accounts_due serves them as well.
+        "CREATE INDEX idx_accounts_unpaid_due ON accounts (due_date) WHERE paid = 0",
+        "DROP INDEX IF EXISTS idx_accounts_paid_due",
+    ]),
+]
+
+
+def get_schema_version():
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations():
+    """Create the schema on first start and apply every pending version.
+
+    Each version runs in its own transaction together with the
+    user_version bump, so a failed step leaves the database untouched.
+    Foreign keys are switched off while migrating (table rebuilds) and
+    checked before the last pending version commits.
+    """
+    conn = get_connection()
+    current = get_schema_version()
+    pending = [(version, steps) for version, steps in MIGRATIONS if version > current]
+
+    # Can only be changed outside a transaction
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for version, steps in pending:
+            with transaction() as cursor:
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+
+                violations = []
+                if version == pending[-1][0]:
+                    violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    raise sqlite3.IntegrityError(
+                        f"Migration {version} left foreign key violations: {violations[:5]}"
+                    )
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+            current = version
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+    # Refresh planner statistics for the new indexes
+    conn.execute("PRAGMA optimize")
+    return current
@@ -0,0 +1,148 @@
+"""Columnar in-memory snapshot of the orders table for analytics.
+
+Needs NumPy and Pandas (optional dependencies): import this module lazily,
+as the dashboard does. One row per order, stored as columns instead of
+Python tuples: int64 ids, int32 day numbers (days since 1970-01-01) for
+dates, float64 totals and categorical client_id, status and
+fulfillment_method.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.connection import read_cursor, write_count
+
+# Day number used for orders without a date
+MISSING_DAY = np.iinfo(np.int32).min
+
+_COLUMNS = ["id", "client_id", "date", "status", "fulfillment_method", "total", "row_version"]
+_CATEGORICAL = ["client_id", "status", "fulfillment_method"]
+
+
+def _to_day_numbers(dates):
+    days = pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce")
+    numbers = days.values.astype("datetime64[D]").astype(np.int64)
+    numbers[days.isna()] = MISSING_DAY
+    return numbers.astype(np.int32)
+
+
+def _frame(rows):
+    raw = pd.DataFrame.from_records(rows, columns=_COLUMNS)
+    frame = pd.DataFrame({
+        "id": raw["id"].astype(np.int64),
+        "client_id": raw["client_id"].astype("Int64").astype("category"),
+        "day": _to_day_numbers(raw["date"]),
+        "status": raw["status"].astype("category"),
+        "fulfillment_method": raw["fulfillment_method"].astype("category"),
+        "total": raw["total"].astype(np.float64),
+        "row_version": raw["row_version"].astype(np.int64),
+    })
+    return frame
+
+
+def _concat(frames):
+    # Concatenating categoricals with different categories falls back to
+    # object columns; union the categories first so they stay categorical.
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return _frame([])
+    if len(frames) == 1:
+        return frames[0]
+    for column in _CATEGORICAL:
+        categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+class OrderSnapshot:
+    """Orders as a Pandas frame, refreshed incrementally.
+
+    refresh() does nothing when no write was committed since the last one;
+    otherwise it loads only the orders whose row_version (taken from a
+    monotonic counter by triggers on every insert/update) is newer than the
+    snapshot, and re-reads the id list only when the row count shows that
+    orders were deleted.
+    """
+
+    def __init__(self):
+        self.frame = _frame([])
+        self.version = 0
+        self._writes = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def refresh(self):
+        """Bring the snapshot up to date; returns True if anything changed."""
+        with self._lock:
+            writes = write_count()
+            if writes == self._writes:
+                return False
+
+            with read_cursor() as cursor:
+                count = cursor.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+                changed = cursor.execute(f"""
+                    SELECT {', '.join(_COLUMNS)}
+                    FROM orders
+                    WHERE row_version > ?
+                """, (self.version,)).fetchall()
+
+                frame = self.frame
+                version = self.version
+                if changed:
+                    updates = _frame(changed)
+                    frame = _concat([frame[~frame["id"].isin(updates["id"])], updates])
+                    version = int(updates["row_version"].max())
+
+                deleted = len(frame) != count
+                if deleted:
+                    cursor.execute("SELECT id FROM orders")
+                    ids = np.fromiter((row[0] for row in cursor), dtype=np.int64, count=count)
+                    frame = frame[frame["id"].isin(ids)]
+
+            self.frame = frame.sort_values("id", ignore_index=True)
+            self.version = version
+            self._writes = writes
+            return bool(changed) or deleted
+
+    def revenue_by_period(self, period="day", date_from=None, date_to=None):
+        """(period, order count, total) per day (YYYY-MM-DD) or month (YYYY-MM)."""
+        frame = self._between(date_from, date_to)
+        dates = frame["day"].values.astype("datetime64[D]")
+        if period == "month":
+            keys = np.datetime_as_string(dates.astype("datetime64[M]"))
+        else:
+            keys = np.datetime_as_string(dates)
+        grouped = frame.groupby(keys)["total"].agg(["count", "sum"])
+        return [(key, int(count), float(total)) for key, count, total in grouped.itertuples()]
+
+    def status_totals(self, date_from=None, date_to=None):
+        """(status, order count, total) like db_utils.get_order_status_totals."""
+        frame = self._between(date_from, date_to)
+        grouped = frame.groupby("status", observed=True)["total"].agg(["count", "sum"])
+        return [(status, int(count), float(total)) for status, count, total in grouped.itertuples()]
+
+    def _between(self, date_from=None, date_to=None):
+        frame = self.frame[self.frame["day"] != MISSING_DAY]
+        if date_from is not None:
+            frame = frame[frame["day"] >= _to_day_numbers([date_from])[0]]
+        if date_to is not None:
+            frame = frame[frame["day"] <= _to_day_numbers([date_to])[0]]
+        return frame
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_order_snapshot():
+    """Shared snapshot, refreshed before being returned."""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = OrderSnapshot()
+    _snapshot.refresh()
+    return _snapshot
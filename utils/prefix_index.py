@@ -0,0 +1,64 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+_PHONE_QUERY = re.compile(r"[\d\s()+\-.]+")
+
+
+def normalize(text):
+    """Casefold and strip accents, so "joão" and "JOAO" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+class PrefixIndex:
+    """Sorted in-memory prefix index over (id, name, ...) rows.
+
+    Every word suffix of the name is a key ("joao silva", "silva"), as are
+    the digits of phone fields (with and without the area code), so a
+    prefix lookup is two bisects over one sorted list, with no database
+    round trip. search() returns matching rows, at most limit of them,
+    in key order.
+    """
+
+    def __init__(self, rows, name_fields=(1,), phone_fields=()):
+        entries = []
+        for position, row in enumerate(rows):
+            for field in name_fields:
+                words = normalize(row[field]).split()
+                for start in range(len(words)):
+                    entries.append((" ".join(words[start:]), position))
+            for field in phone_fields:
+                digits = re.sub(r"\D", "", row[field] or "")
+                if digits:
+                    entries.append((digits, position))
+                if len(digits) >= 10:
+                    entries.append((digits[2:], position))  # without the area code
+
+        entries.sort()
+        self.rows = rows
+        self._keys = [key for key, _ in entries]
+        self._positions = [position for _, position in entries]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, text, limit=20):
+        query = normalize(text)
+        if _PHONE_QUERY.fullmatch(query):
+            query = re.sub(r"\D", "", query)
+        if not query:
+            return list(self.rows[:limit])
+
+        results = []
+        seen = set()
+        for index in range(bisect_left(self._keys, query), len(self._keys)):
+            if not self._keys[index].startswith(query):
+                break
+            position = self._positions[index]
+            if position not in seen:
+                seen.add(position)
+                results.append(self.rows[position])
+                if len(results) >= limit:
+                    break
+        return results
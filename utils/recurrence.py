@@ -0,0 +1,89 @@
+import calendar
+import logging
+from datetime import date, timedelta
+
+from utils.connection import transaction
+from utils.constants import RECURRENCE_HORIZON_DAYS
+from utils.date_utils import ISO_FORMAT, parse_date
+from utils.instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+
+def _add_months(start, months):
+    # Keeps the start day, clamped to the month length (31/01 -> 28/02 -> 31/03)
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def nth_occurrence(start, rule, n):
+    """Due date of the n-th occurrence (0 = start) of a series.
+
+    Always computed from the start date, so clamped days (29/02, 31st) do
+    not drift over time.
+    """
+    if rule == "weekly":
+        return start + timedelta(weeks=n)
+    if rule == "monthly":
+        return _add_months(start, n)
+    if rule == "yearly":
+        return _add_months(start, 12 * n)
+    raise ValueError(f"Unknown recurrence rule: {rule!r}")
+
+
+def occurrences(start, rule, after, until):
+    """Due dates of the series in (after, until], in order."""
+    n = 1
+    while True:
+        due = nth_occurrence(start, rule, n)
+        if due > until:
+            return
+        if due > after:
+            yield due
+        n += 1
+
+
+@instrumented
+def generate_recurring_accounts(today=None, horizon_days=RECURRENCE_HORIZON_DAYS):
+    """Create the occurrences of every recurring account up to the horizon.
+
+    Only series not yet generated up to the horizon are read (partial
+    index on the templates), and all new occurrences go in one batched
+    insert. Re-running is harmless: the (series_id, due_date) unique index
+    makes existing occurrences be skipped. Returns how many were created.
+    """
+    horizon = (today or date.today()) + timedelta(days=horizon_days)
+    horizon_iso = horizon.strftime(ISO_FORMAT)
+
+    with transaction() as cursor:
+        templates = cursor.execute("""
+            SELECT id, name, amount, due_date, recurrence, generated_until
+            FROM accounts
+            WHERE recurrence IS NOT NULL
+              AND (generated_until IS NULL OR generated_until < ?)
+        """, (horizon_iso,)).fetchall()
+
+        new_accounts = []
+        progress = []
+        for series_id, name, amount, due_date, rule, generated_until in templates:
+            start = parse_date(due_date)
+            if start is None:
+                continue
+            after = parse_date(generated_until) or start
+            for due in occurrences(start, rule, after, horizon):
+                new_accounts.append((name, amount, due.strftime(ISO_FORMAT), series_id))
+            progress.append((horizon_iso, series_id))
+
+        before = cursor.connection.total_changes
+        cursor.executemany("""
+            INSERT OR IGNORE INTO accounts (name, amount, due_date, recurring, paid, series_id)
+            VALUES (?, ?, ?, 1, 0, ?)
+        """, new_accounts)
+        created = cursor.connection.total_changes - before
+
+        cursor.executemany("UPDATE accounts SET generated_until = ? WHERE id = ?", progress)
+
+    if created:
+        logger.info("Generated %d recurring account occurrences up to %s", created, horizon_iso)
+    return created
@@ -0,0 +1,54 @@
+import threading
+
+from utils.entity_registry import EntityRegistry
+
+
+class ReferenceCache:
+    """Read-through cache for small reference tables (clients, service items).
+
+    Writers call invalidate(), which bumps the generation counter; the next
+    get() reloads from the database once and every reader shares that
+    snapshot. Views can compare generation to know when to rebuild widgets;
+    registry() gives the same snapshot indexed by id and name, and
+    derived(factory) any other structure built from it.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.generation = 0
+        self._rows = None
+        self._registry = None
+        self._derived = {}
+        self._loaded_generation = -1
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+
+    def get(self):
+        with self._lock:
+            if self._loaded_generation != self.generation:
+                generation = self.generation
+                self._rows = self.loader()
+                self._registry = None
+                self._derived = {}
+                self._loaded_generation = generation
+            return self._rows
+
+    def registry(self):
+        rows = self.get()
+        with self._lock:
+            if self._registry is None or self._registry.rows is not rows:
+                self._registry = EntityRegistry(rows)
+            return self._registry
+
+    def derived(self, factory):
+        """factory(rows) for the current snapshot, rebuilt only after a reload."""
+        rows = self.get()
+        with self._lock:
+            built = self._derived.get(factory)
+            if built is None or built[0] is not rows:
+                built = (rows, factory(rows))
+                self._derived[factory] = built
+            return built[1]
@@ -0,0 +1,101 @@
+import threading
+from datetime import date, timedelta
+
+from utils.connection import write_count
+from utils.date_utils import ISO_FORMAT, parse_date, to_iso
+from utils.db_utils import get_order_status_totals, get_account_totals
+
+# Report results keyed by (report, filters); an entry is valid until the
+# next committed write, so repeated reports over the same filter are free.
+_MAX_CACHED = 256
+_cache = {}
+_lock = threading.Lock()
+
+
+def _cached(name, filters, compute):
+    key = (name, tuple(sorted(filters.items())))
+    writes = write_count()
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == writes:
+            return hit[1]
+
+    value = compute()
+    with _lock:
+        if len(_cache) >= _MAX_CACHED:
+            _cache.clear()
+        # Stored under the count read before computing: a concurrent write
+        # makes the entry stale right away instead of hiding the change.
+        _cache[key] = (writes, value)
+    return value
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def order_report(filters):
+    """Order count and value, in total and per status, over the filters of
+    get_orders_filtered (client_id, status, date_from, date_to, search)."""
+    def compute():
+        by_status = {
+            status: (count, total)
+            for status, count, total in get_order_status_totals(**filters)
+        }
+        return {
+            "count": sum(count for count, _ in by_status.values()),
+            "total": sum(total for _, total in by_status.values()),
+            "by_status": by_status,
+        }
+
+    return _cached("orders", filters, compute)
+
+
+def account_report(filters, today=None):
+    """Account counts and sums (all, paid, pending, overdue) over the filters
+    of get_accounts_filtered (paid, due_from, due_to, status)."""
+    today = to_iso(today or date.today())
+
+    def compute():
+        count, total, paid_count, paid_total, overdue_count, overdue_total = \
+            get_account_totals(today, **filters)
+        return {
+            "count": count,
+            "total": total,
+            "paid_count": paid_count,
+            "paid_total": paid_total,
+            "pending_count": count - paid_count,
+            "pending_total": total - paid_total,
+            "overdue_count": overdue_count,
+            "overdue_total": overdue_total,
+        }
+
+    return _cached("accounts", {**filters, "today": today}, compute)
+
+
+def previous_period(date_from, date_to):
+    """The period of the same length right before [date_from, date_to]
+    (ISO strings, inclusive); None unless both ends are given."""
+    start, end = parse_date(date_from), parse_date(date_to)
+    if start is None or end is None or end < start:
+        return None
+    length = end - start + timedelta(days=1)
+    return (start - length).strftime(ISO_FORMAT), (end - length).strftime(ISO_FORMAT)
+
+
+def with_previous_period(report, filters, from_key="date_from", to_key="date_to"):
+    """(current, previous) results of report for the filters and for the
+    preceding period of the same length; previous is None without a range."""
+    current = report(filters)
+    period = previous_period(filters.get(from_key), filters.get(to_key))
+    if period is None:
+        return current, None
+    return current, report({**filters, from_key: period[0], to_key: period[1]})
+
+
+def percent_change(current, previous):
+    """Relative change in percent, or None when there is no base to compare."""
+    if not previous:
+        return None
+    return (current - previous) / abs(previous) * 100
@@ -3,8 +3,14 @@ from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 from typing import List, Tuple
 from utils.db_utils import (
-    insert_account, get_all_accounts, update_account, delete_account
+    insert_account, get_accounts_filtered, update_account, mark_account_paid, delete_account
 )
+from utils.date_utils import br_to_iso, iso_to_br, parse_date
+from utils.constants import RECURRENCE_RULES
+from utils.db_worker import get_worker
+from utils.recurrence import generate_recurring_accounts
+from utils.reports import account_report, with_previous_period, percent_change
+from widgets.paged_treeview import PagedTreeview
 
 
 class AccountsTab:
@@ -15,7 +21,8 @@ class AccountsTab:
         self.parent.configure(bg="#f9f9f9")
 
         self.selected_id = tk.StringVar()
-        self.all_accounts = []
+        self.current_filters = {}
+        self.worker = get_worker(parent)
 
         self._setup_ui()
         self.load_accounts()
@@ -78,13 +85,21 @@ class AccountsTab:
         )
         self.check_recorrente.grid(row=1, column=2, padx=5, pady=5, sticky="w")
 
+        # Repetição das contas recorrentes
+        self.var_recorrencia = tk.StringVar(value="Mensal")
+        self.combo_recorrencia = ttk.Combobox(
+            form_frame, textvariable=self.var_recorrencia,
+            values=list(RECURRENCE_RULES), state="readonly", width=10
+        )
+        self.combo_recorrencia.grid(row=1, column=3, padx=5, pady=5, sticky="w")
+
         # Pago
         self.var_pago = tk.BooleanVar()
         self.check_pago = tk.Checkbutton(
             form_frame, text="Pago",
             variable=self.var_pago, bg="#f9f9f9"
         )
-        self.check_pago.grid(row=1, column=3, padx=5, pady=5, sticky="w")
+        self.check_pago.grid(row=1, column=4, padx=5, pady=5, sticky="w")
 
     def _create_filters_section(self):
         """Cria a seção de filtros"""
@@ -169,6 +184,15 @@ class AccountsTab:
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
+        # Carrega as contas por páginas conforme a rolagem (keyset por vencimento, id)
+        self.pager = PagedTreeview(
+            self.tree, scrollbar,
+            fetch_page=lambda **page: get_accounts_filtered(**self.current_filters, **page),
+            format_row=self._format_account_row,
+            row_key=lambda account: (account[3], account[0]),
+            worker=self.worker
+        )
+
         # Bind selection event
         self.tree.bind("<<TreeviewSelect>>", self.on_account_select)
 
@@ -182,93 +206,63 @@ class AccountsTab:
             ("✏️ Editar", self.edit_account, "#2196F3"),
             ("✅ Marcar como Paga", self.mark_as_paid, "#FF9800"),
             ("🗑️ Excluir", self.delete_account, "#f44336"),
-            ("🧹 Limpar", self.clear_fields, "#9C27B0")
+            ("🧹 Limpar", self.clear_fields, "#9C27B0"),
+            ("📊 Relatório", self.generate_report, "#607D8B")
         ]
 
+        # Desabilitados enquanto uma gravação está em andamento (evita cliques duplos)
+        self.action_buttons = []
         for text, command, color in buttons:
-            tk.Button(
+            button = tk.Button(
                 button_frame, text=text, command=command,
                 bg=color, fg="white", width=15
-            ).pack(side="left", padx=5)
+            )
+            button.pack(side="left", padx=5)
+            self.action_buttons.append(button)
 
     def load_accounts(self):
-        """Carrega todas as contas"""
-        self.all_accounts = get_all_accounts()
+        """Recarrega as contas com os filtros atuais"""
         self.apply_filters()
 
     def apply_filters(self):
-        """Aplica os filtros selecionados"""
-        filtered_accounts = self.all_accounts.copy()
+        """Aplica os filtros selecionados direto na consulta SQL"""
+        # Filtro por data de vencimento (datas inválidas são ignoradas)
+        start_date = self._parse_date(self.start_date_var.get())
+        end_date = self._parse_date(self.end_date_var.get())
 
-        # Filtro por status
-        status_filter = self.status_filter_var.get()
-        if status_filter != "Todos":
-            if status_filter == "Pendentes":
-                filtered_accounts = [a for a in filtered_accounts if not a[5]]  # paid = False
-            elif status_filter == "Pagas":
-                filtered_accounts = [a for a in filtered_accounts if a[5]]  # paid = True
-            elif status_filter == "Atrasadas":
-                hoje = datetime.now().date()
-                filtered_accounts = [
-                    a for a in filtered_accounts
-                    if not a[5] and self._parse_date(a[3]) < hoje
-                ]
-
-        # Filtro por data de vencimento
-        try:
-            start_date = self._parse_date(self.start_date_var.get())
-            end_date = self._parse_date(self.end_date_var.get())
+        filters = {"paid": None, "due_from": start_date, "due_to": end_date}
 
-            if start_date and end_date:
-                filtered_accounts = [
-                    a for a in filtered_accounts
-                    if start_date <= self._parse_date(a[3]) <= end_date
-                ]
-        except:
-            pass  # Ignora erros de data
+        # Filtro por status (Atrasadas: vencimento comparado com hoje no SQL)
+        status_filter = self.status_filter_var.get()
+        if status_filter == "Pendentes":
+            filters["paid"] = False
+        elif status_filter == "Pagas":
+            filters["paid"] = True
+        elif status_filter == "Atrasadas":
+            filters["status"] = "Atrasado"
+
+        self.current_filters = {
+            key: value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else value
+            for key, value in filters.items()
+        }
 
-        self.display_accounts(filtered_accounts)
+        self.pager.reset()
 
     def _parse_date(self, date_str):
-        """Converte string de data para objeto datetime"""
-        try:
-            return datetime.strptime(date_str, "%d/%m/%Y").date()
-        except:
-            try:
-                return datetime.strptime(date_str, "%Y-%m-%d").date()
-            except:
-                return None
-
-    def display_accounts(self, accounts):
-        """Exibe as contas na treeview"""
-        # Limpa a treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        hoje = datetime.now().date()
-
-        for account in accounts:
-            # Determina o status
-            vencimento = self._parse_date(account[3])
-            if account[5]:  # Se está pago
-                status = "Pago"
-                status_color = "green"
-            elif vencimento and vencimento < hoje:
-                status = "Atrasado"
-                status_color = "red"
-            else:
-                status = "Pendente"
-                status_color = "orange"
-
-            self.tree.insert("", "end", values=(
-                account[0],  # ID
-                account[1],  # Descrição
-                f"R$ {account[2]:.2f}",  # Valor
-                account[3],  # Vencimento
-                "Sim" if account[4] else "Não",  # Recorrente
-                "Sim" if account[5] else "Não",  # Pago
-                status  # Status
-            ))
+        """Converte a data digitada no filtro (None se inválida)"""
+        return parse_date(date_str)
+
+    def _format_account_row(self, account):
+        """Valores exibidos na treeview para uma conta"""
+        return (
+            account[0],  # ID
+            account[1],  # Descrição
+            f"R$ {account[2]:.2f}",  # Valor
+            iso_to_br(account[3]),  # Vencimento
+            "Sim" if account[4] else "Não",  # Recorrente
+            "Sim" if account[5] else "Não",  # Pago
+            account[7]  # Status (calculado no SQL)
+        )
 
     def clear_filters(self):
         """Limpa todos os filtros"""
@@ -283,11 +277,8 @@ class AccountsTab:
         if not selection:
             return
 
-        item = self.tree.item(selection[0])
-        account_id = item['values'][0]
-
         # Encontra a conta completa
-        account = next((a for a in self.all_accounts if a[0] == account_id), None)
+        account = self.pager.get_row(selection[0])
         if not account:
             return
 
@@ -297,10 +288,19 @@ class AccountsTab:
         self.entry_valor.delete(0, tk.END)
         self.entry_valor.insert(0, str(account[2]))
         self.entry_vencimento.delete(0, tk.END)
-        self.entry_vencimento.insert(0, account[3])
+        self.entry_vencimento.insert(0, iso_to_br(account[3]))
         self.var_recorrente.set(bool(account[4]))
+        self.var_recorrencia.set(self._recurrence_label(account[6]))
         self.var_pago.set(bool(account[5]))
 
+    @staticmethod
+    def _recurrence_label(rule):
+        """Nome exibido da regra de repetição (Mensal se não definida)"""
+        for label, value in RECURRENCE_RULES.items():
+            if value == rule:
+                return label
+        return "Mensal"
+
     def validate_form(self):
         """Valida os dados do formulário"""
         if not self.entry_descricao.get().strip():
@@ -320,8 +320,7 @@ class AccountsTab:
     def format_date_br_to_iso(self, date_str):
         """Converte data do formato BR para ISO"""
         try:
-            d, m, y = date_str.split("/")
-            return f"{y}-{m}-{d}"
+            return br_to_iso(date_str)
         except ValueError:
             messagebox.showerror("Erro", "Formato de data inválido. Use DD/MM/AAAA")
             return None
@@ -339,16 +338,35 @@ class AccountsTab:
             descricao = self.entry_descricao.get().strip()
             valor = float(self.entry_valor.get().replace(',', '.'))
             recorrente = self.var_recorrente.get()
+            recorrencia = RECURRENCE_RULES[self.var_recorrencia.get()]
             pago = self.var_pago.get()
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Erro ao adicionar conta: {str(e)}")
+            return
 
-            insert_account(descricao, valor, vencimento_iso, recorrente, pago)
+        self._submit_write(
+            insert_account, descricao, valor, vencimento_iso, recorrente, pago, recorrencia,
+            success=("✅", "Conta adicionada com sucesso!"),
+            error="Erro ao adicionar conta"
+        )
 
-            self.load_accounts()
+    def _submit_write(self, func, *args, success, error):
+        """Executa uma gravação no worker e atualiza a tela ao concluir"""
+        def on_success(_):
+            self.pager.refresh()
             self.clear_fields()
-            messagebox.showinfo("✅", "Conta adicionada com sucesso!")
+            messagebox.showinfo(*success)
+            # Gera as próximas ocorrências de contas recorrentes novas/alteradas
+            self.worker.submit(
+                generate_recurring_accounts,
+                on_success=lambda created: created and self.pager.refresh()
+            )
 
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao adicionar conta: {str(e)}")
+        self.worker.submit_write(
+            self.action_buttons, func, *args,
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"{error}: {str(e)}")
+        )
 
     def edit_account(self):
         """Edita uma conta existente"""
@@ -368,16 +386,17 @@ class AccountsTab:
             descricao = self.entry_descricao.get().strip()
             valor = float(self.entry_valor.get().replace(',', '.'))
             recorrente = self.var_recorrente.get()
+            recorrencia = RECURRENCE_RULES[self.var_recorrencia.get()]
             pago = self.var_pago.get()
-
-            update_account(account_id, descricao, valor, vencimento_iso, recorrente, pago)
-
-            self.load_accounts()
-            self.clear_fields()
-            messagebox.showinfo("✏️", "Conta atualizada com sucesso!")
-
-        except Exception as e:
+        except ValueError as e:
             messagebox.showerror("Erro", f"Erro ao editar conta: {str(e)}")
+            return
+
+        self._submit_write(
+            update_account, account_id, descricao, valor, vencimento_iso, recorrente, pago, recorrencia,
+            success=("✏️", "Conta atualizada com sucesso!"),
+            error="Erro ao editar conta"
+        )
 
     def mark_as_paid(self):
         """Marca a conta selecionada como paga"""
@@ -385,31 +404,21 @@ class AccountsTab:
             messagebox.showwarning("⚠️", "Selecione uma conta para marcar como paga.")
             return
 
-        try:
-            account_id = int(self.selected_id.get())
-
-            # Encontra a conta atual
-            account = next((a for a in self.all_accounts if a[0] == account_id), None)
-            if not account:
+        def on_success(updated):
+            if not updated:
                 messagebox.showerror("Erro", "Conta não encontrada.")
                 return
 
-            # Atualiza apenas o status de pago
-            update_account(
-                account_id,
-                account[1],  # descricao
-                account[2],  # valor
-                account[3],  # vencimento
-                account[4],  # recorrente
-                True  # pago
-            )
-
-            self.load_accounts()
+            self.pager.refresh()
             self.clear_fields()
             messagebox.showinfo("✅", "Conta marcada como paga!")
 
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao marcar conta como paga: {str(e)}")
+        # Atualiza apenas o status de pago
+        self.worker.submit_write(
+            self.action_buttons, mark_account_paid, int(self.selected_id.get()),
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao marcar conta como paga: {str(e)}")
+        )
 
     def delete_account(self):
         """Exclui a conta selecionada"""
@@ -421,13 +430,11 @@ class AccountsTab:
                 "🗑️ Confirmar Exclusão",
                 "Tem certeza que deseja excluir esta conta?\nEsta ação não pode ser desfeita."
         ):
-            try:
-                delete_account(int(self.selected_id.get()))
-                self.load_accounts()
-                self.clear_fields()
-                messagebox.showinfo("🗑️", "Conta excluída com sucesso.")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao excluir conta: {str(e)}")
+            self._submit_write(
+                delete_account, int(self.selected_id.get()),
+                success=("🗑️", "Conta excluída com sucesso."),
+                error="Erro ao excluir conta"
+            )
 
     def clear_fields(self):
         """Limpa todos os campos do formulário"""
@@ -438,45 +445,45 @@ class AccountsTab:
         data_padrao = (datetime.now() + timedelta(days=30)).strftime("%d/%m/%Y")
         self.entry_vencimento.insert(0, data_padrao)
         self.var_recorrente.set(False)
+        self.var_recorrencia.set("Mensal")
         self.var_pago.set(False)
         self.selected_id.set("")
         self.tree.selection_remove(self.tree.selection())
 
     def generate_report(self):
-        """Gera um relatório das contas"""
-        total_contas = len(self.tree.get_children())
-        if total_contas == 0:
+        """Gera um relatório das contas do filtro atual, comparado ao período anterior"""
+        # Totais calculados no SQL sobre todo o filtro, não só as linhas exibidas
+        self.worker.submit(
+            with_previous_period, account_report, dict(self.current_filters), "due_from", "due_to",
+            on_success=self._show_report,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao gerar relatório: {str(e)}")
+        )
+
+    def _show_report(self, reports):
+        current, previous = reports
+        if current["count"] == 0:
             messagebox.showinfo("📊 Relatório", "Nenhuma conta para gerar relatório.")
             return
 
-        # Calcula totais
-        total_pendente = 0
-        total_pago = 0
-        contas_atrasadas = 0
-
-        for item in self.tree.get_children():
-            account_data = self.tree.item(item)['values']
-            valor = float(account_data[2].replace("R$ ", "").replace(",", ""))
-            status = account_data[6]
-
-            if status == "Pago":
-                total_pago += valor
-            else:
-                total_pendente += valor
-                if status == "Atrasado":
-                    contas_atrasadas += 1
-
         report = f"""
 📊 RELATÓRIO DE CONTAS A PAGAR
 
-📈 Total de Contas: {total_contas}
-💰 Total Pendente: R$ {total_pendente:.2f}
-💰 Total Pago: R$ {total_pago:.2f}
-💰 Valor Total: R$ {total_pendente + total_pago:.2f}
+📈 Total de Contas: {current["count"]}
+💰 Total Pendente: R$ {current["pending_total"]:.2f} ({current["pending_count"]} contas)
+💰 Total Pago: R$ {current["paid_total"]:.2f} ({current["paid_count"]} contas)
+💰 Valor Total: R$ {current["total"]:.2f}
 
-⚠️  Contas Atrasadas: {contas_atrasadas}
+⚠️  Contas Atrasadas: {current["overdue_count"]} (R$ {current["overdue_total"]:.2f})
 """
 
+        if previous is not None:
+            change = percent_change(current["total"], previous["total"])
+            report += f"""
+🔁 Período Anterior: {previous["count"]} contas, R$ {previous["total"]:.2f}"""
+            if change is not None:
+                report += f" ({change:+.1f}%)"
+            report += "\n"
+
         messagebox.showinfo("📊 Relatório de Contas", report)
 
 
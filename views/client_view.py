@@ -1,10 +1,13 @@
 import tkinter as tk
 from tkinter import messagebox
-from utils.db_utils import insert_client, get_all_clients, update_client, delete_client
+from utils.db_utils import insert_client, get_cached_clients, update_client, delete_client, search_clients
+from utils.db_worker import get_worker
+from widgets.virtual_list import VirtualList
 
 # Function to build the client tab inside the main notebook
 def build_client_tab(parent):
     parent.configure(bg="#f9f9f9")
+    worker = get_worker(parent)
 
     # --- Title ---
     tk.Label(parent, text="📇 Cadastro de Clientes", font=("Helvetica", 18, "bold"), bg="#f9f9f9", fg="#333").pack(pady=10)
@@ -43,7 +46,7 @@ def build_client_tab(parent):
         entry_endereco.delete(0, tk.END)
         entry_email.delete(0, tk.END)
         selected_id.set("")
-        client_listbox.selection_clear(0, tk.END)
+        client_list.clear_selection()
 
     # Function to register a new client
     def register_client():
@@ -56,10 +59,16 @@ def build_client_tab(parent):
             messagebox.showwarning("⚠️ Atenção", "O nome é obrigatório.")
             return
 
-        insert_client(nome, telefone, endereco, email)
-        messagebox.showinfo("✅ Sucesso", "Cliente cadastrado com sucesso!")
-        clear_fields()
-        list_clients()
+        def on_success(_):
+            messagebox.showinfo("✅ Sucesso", "Cliente cadastrado com sucesso!")
+            clear_fields()
+            list_clients()
+
+        worker.submit_write(
+            action_buttons, insert_client, nome, telefone, endereco, email,
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao cadastrar cliente: {str(e)}")
+        )
 
     # Function to update selected client
     def edit_client():
@@ -67,16 +76,21 @@ def build_client_tab(parent):
             messagebox.showwarning("⚠️ Atenção", "Selecione um cliente para editar.")
             return
 
-        update_client(
+        def on_success(_):
+            messagebox.showinfo("✏️ Atualizado", "Cliente atualizado com sucesso!")
+            clear_fields()
+            list_clients()
+
+        worker.submit_write(
+            action_buttons, update_client,
             int(selected_id.get()),
             entry_nome.get(),
             entry_telefone.get(),
             entry_endereco.get(),
-            entry_email.get()
+            entry_email.get(),
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao editar cliente: {str(e)}")
         )
-        messagebox.showinfo("✏️ Atualizado", "Cliente atualizado com sucesso!")
-        clear_fields()
-        list_clients()
 
     # Function to delete selected client
     def remove_client():
@@ -86,39 +100,69 @@ def build_client_tab(parent):
 
         confirm = messagebox.askyesno("🗑️ Confirmação", "Tem certeza que deseja excluir este cliente?")
         if confirm:
-            delete_client(int(selected_id.get()))
-            messagebox.showinfo("🗑️ Excluído", "Cliente excluído com sucesso!")
-            clear_fields()
-            list_clients()
-
-    # Buttons with emojis and styling
-    tk.Button(button_frame, text="➕ Cadastrar", width=15, command=register_client, bg="#4CAF50", fg="white").grid(row=0, column=0, padx=5)
-    tk.Button(button_frame, text="✏️ Editar", width=15, command=edit_client, bg="#2196F3", fg="white").grid(row=0, column=1, padx=5)
-    tk.Button(button_frame, text="🗑️ Excluir", width=15, command=remove_client, bg="#f44336", fg="white").grid(row=0, column=2, padx=5)
-    tk.Button(button_frame, text="🧹 Limpar", width=15, command=clear_fields, bg="#9E9E9E", fg="white").grid(row=0, column=3, padx=5)
+            def on_success(_):
+                messagebox.showinfo("🗑️ Excluído", "Cliente excluído com sucesso!")
+                clear_fields()
+                list_clients()
+
+            worker.submit_write(
+                action_buttons, delete_client, int(selected_id.get()),
+                on_success=on_success,
+                on_error=lambda e: messagebox.showerror("Erro", f"Erro ao excluir cliente: {str(e)}")
+            )
+
+    # Buttons with emojis and styling (disabled while a save is running)
+    action_buttons = [
+        tk.Button(button_frame, text="➕ Cadastrar", width=15, command=register_client, bg="#4CAF50", fg="white"),
+        tk.Button(button_frame, text="✏️ Editar", width=15, command=edit_client, bg="#2196F3", fg="white"),
+        tk.Button(button_frame, text="🗑️ Excluir", width=15, command=remove_client, bg="#f44336", fg="white"),
+        tk.Button(button_frame, text="🧹 Limpar", width=15, command=clear_fields, bg="#9E9E9E", fg="white"),
+    ]
+    for column, button in enumerate(action_buttons):
+        button.grid(row=0, column=column, padx=5)
 
     # --- Listbox section ---
     tk.Label(parent, text="📋 Clientes cadastrados:", font=("Helvetica", 14), bg="#f9f9f9").pack(pady=10)
-    client_listbox = tk.Listbox(parent, width=80, height=10)
-    client_listbox.pack(pady=5)
 
-    # Function to list all clients
+    # --- Search box (full-text: name, phone, address, email) ---
+    search_frame = tk.Frame(parent, bg="#f9f9f9")
+    search_frame.pack()
+    tk.Label(search_frame, text="🔍 Buscar:", bg="#f9f9f9").pack(side="left", padx=5)
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(search_frame, textvariable=search_var, width=40)
+    search_entry.pack(side="left", padx=5)
+    search_job = [None]
+
+    client_list = VirtualList(parent, lambda client: f"{client[0]} - {client[1]} | {client[2]}", width=80, height=10)
+    client_list.pack(pady=5)
+
+    # Function to list all clients, or the best matches of the search box
+    # (queried on the worker; only the visible lines are drawn)
     def list_clients():
-        clients = get_all_clients()
-        client_listbox.delete(0, tk.END)
+        text = search_var.get().strip()
+        if text:
+            worker.submit(search_clients, text, limit=500, on_success=client_list.set_rows, key="client_tab.list")
+        else:
+            worker.submit(get_cached_clients, on_success=client_list.set_rows, key="client_tab.list")
+
+    # Search again once typing pauses
+    def on_search_key(event):
+        if search_job[0] is not None:
+            parent.after_cancel(search_job[0])
+        search_job[0] = parent.after(200, run_search)
+
+    def run_search():
+        search_job[0] = None
+        list_clients()
 
-        for client in clients:
-            texto = f"{client[0]} - {client[1]} | {client[2]}"
-            client_listbox.insert(tk.END, texto)
+    search_entry.bind("<KeyRelease>", on_search_key)
 
     # Function to load selected client into form
     def on_select(event):
-        if not client_listbox.curselection():
+        client = client_list.selected_row()
+        if client is None:
             return
 
-        index = client_listbox.curselection()[0]
-        client = get_all_clients()[index]
-
         selected_id.set(client[0])
         entry_nome.delete(0, tk.END)
         entry_nome.insert(0, client[1])
@@ -132,5 +176,5 @@ def build_client_tab(parent):
         entry_email.delete(0, tk.END)
         entry_email.insert(0, client[4])
 
-    client_listbox.bind("<<ListboxSelect>>", on_select)
+    client_list.bind("<<VirtualListSelect>>", on_select)
     list_clients()
\ No newline at end of file
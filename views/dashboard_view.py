@@ -0,0 +1,176 @@
+import logging
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime, timedelta
+from utils.db_utils import get_payables_by_month
+from utils.db_worker import get_worker
+
+logger = logging.getLogger(__name__)
+
+# Janela de tempo exibida em cada granularidade
+PERIODS = {
+    "Diário": ("day", 30),
+    "Mensal": ("month", 365),
+}
+
+
+def _load_dashboard_data(period, days):
+    """Calcula os agregados usados pelos gráficos (roda no worker)"""
+    # Só chamado depois que o Pandas foi importado com sucesso pela aba
+    from utils.order_snapshot import get_order_snapshot
+
+    today = datetime.now().date()
+    date_from = (today - timedelta(days=days)).strftime("%Y-%m-%d")
+    month_from = (today - timedelta(days=365)).strftime("%Y-%m-01")
+    date_to = today.strftime("%Y-%m-%d")
+
+    # Ordens: agregados vetorizados sobre o snapshot colunar, atualizado
+    # incrementalmente; contas: agregado SQL
+    orders = get_order_snapshot()
+    return {
+        "period": period,
+        "date_from": date_from,
+        "date_to": date_to,
+        "revenue": orders.revenue_by_period(period, date_from, date_to),
+        "status": orders.status_totals(date_from, date_to),
+        "receivables": orders.revenue_by_period("month", month_from, date_to),
+        "payables": get_payables_by_month(month_from, date_to),
+    }
+
+
+class DashboardTab:
+    """Aba de dashboard com gráficos de faturamento, status e contas"""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.parent.configure(bg="#f9f9f9")
+
+        self.worker = get_worker(parent)
+        self.period_var = tk.StringVar(value="Diário")
+        self.figure = None
+        self.canvas = None
+
+        self._setup_ui()
+
+        # Matplotlib/Pandas só são importados quando a aba aparece pela primeira vez
+        self.parent.bind("<Map>", self._on_map)
+
+    def _setup_ui(self):
+        """Configura a interface do usuário"""
+        # --- Título ---
+        tk.Label(
+            self.parent,
+            text="📊 Dashboard",
+            font=("Helvetica", 18, "bold"),
+            bg="#f9f9f9"
+        ).pack(pady=10)
+
+        # --- Controles ---
+        controls = tk.Frame(self.parent, bg="#f9f9f9")
+        controls.pack(fill="x", padx=20)
+
+        tk.Label(controls, text="Faturamento:", bg="#f9f9f9").pack(side="left", padx=5)
+        period_combo = ttk.Combobox(
+            controls, textvariable=self.period_var,
+            values=list(PERIODS), state="readonly", width=10
+        )
+        period_combo.pack(side="left", padx=5)
+        period_combo.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+
+        tk.Button(
+            controls, text="🔄 Atualizar", command=self.refresh,
+            bg="#2196F3", fg="white"
+        ).pack(side="left", padx=10)
+
+        # --- Área dos gráficos ---
+        self.chart_frame = tk.Frame(self.parent, bg="#f9f9f9")
+        self.chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+        self.message_label = tk.Label(self.chart_frame, text="Carregando gráficos...", bg="#f9f9f9")
+        self.message_label.pack(pady=20)
+
+    def _on_map(self, event):
+        # Atualiza sempre que a aba volta a ser exibida (consultas agregadas são baratas)
+        if event.widget is self.parent:
+            self.refresh()
+
+    def _create_canvas(self):
+        """Importa o Matplotlib sob demanda e cria a figura (None se indisponível)"""
+        try:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            import pandas  # noqa: F401 - usado em _draw
+        except ImportError as e:
+            logger.warning("Dashboard indisponível: %s", e)
+            self.message_label.config(text="Instale matplotlib e pandas para ver os gráficos.")
+            return False
+
+        self.message_label.pack_forget()
+        self.figure = Figure(figsize=(10, 6), dpi=100)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        return True
+
+    def refresh(self):
+        """Recarrega os agregados no worker e redesenha os gráficos"""
+        if self.canvas is None and not self._create_canvas():
+            return
+
+        period, days = PERIODS[self.period_var.get()]
+        self.worker.submit(
+            _load_dashboard_data, period, days,
+            on_success=self._draw,
+            key="dashboard.refresh"
+        )
+
+    def _draw(self, data):
+        """Desenha os três gráficos a partir dos agregados"""
+        import pandas as pd
+
+        self.figure.clear()
+        revenue_ax = self.figure.add_subplot(2, 1, 1)
+        status_ax = self.figure.add_subplot(2, 2, 3)
+        accounts_ax = self.figure.add_subplot(2, 2, 4)
+
+        # 💵 Faturamento por dia/mês, com zeros nos períodos sem ordens
+        revenue = pd.DataFrame(data["revenue"], columns=["period", "orders", "total"]).set_index("period")
+        if data["period"] == "month":
+            index = pd.period_range(data["date_from"], data["date_to"], freq="M").strftime("%m/%Y")
+            revenue.index = pd.PeriodIndex(revenue.index, freq="M").strftime("%m/%Y")
+        else:
+            index = pd.date_range(data["date_from"], data["date_to"], freq="D").strftime("%d/%m")
+            revenue.index = pd.to_datetime(revenue.index).strftime("%d/%m")
+        revenue = revenue.reindex(index, fill_value=0)
+
+        revenue_ax.bar(revenue.index, revenue["total"], color="#4CAF50")
+        revenue_ax.set_title("Faturamento por " + ("mês" if data["period"] == "month" else "dia"))
+        revenue_ax.set_ylabel("R$")
+        revenue_ax.tick_params(axis="x", labelrotation=60, labelsize=7)
+
+        # 📦 Ordens por status
+        status = pd.DataFrame(data["status"], columns=["status", "orders", "total"])
+        status_ax.bar(status["status"], status["orders"], color="#2196F3")
+        status_ax.set_title("Ordens por status")
+
+        # 💰 A receber (ordens) x a pagar (contas) por mês
+        receivables = pd.DataFrame(data["receivables"], columns=["month", "orders", "receivable"])
+        payables = pd.DataFrame(data["payables"], columns=["month", "payable", "unpaid"])
+        accounts = (
+            receivables.set_index("month")[["receivable"]]
+            .join(payables.set_index("month")[["payable"]], how="outer")
+            .fillna(0)
+            .sort_index()
+        )
+        accounts.index = [f"{month[5:7]}/{month[:4]}" for month in accounts.index]
+        if not accounts.empty:
+            accounts.plot.bar(ax=accounts_ax, color=["#4CAF50", "#f44336"], rot=60, fontsize=7)
+            accounts_ax.legend(["A receber", "A pagar"], fontsize=7)
+        accounts_ax.set_title("A receber x A pagar")
+
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+
+def build_dashboard_tab(parent):
+    """Função principal para construir a aba de dashboard"""
+    return DashboardTab(parent)
@@ -1,10 +1,13 @@
 import tkinter as tk
 from tkinter import messagebox
-from utils.db_utils import insert_item, get_all_items, update_item, delete_item
+from utils.db_utils import insert_item, get_cached_items, update_item, delete_item
+from utils.db_worker import get_worker
+from widgets.virtual_list import VirtualList
 
 # Function to build the service items tab inside the main notebook
 def build_item_tab(parent):
     parent.configure(bg="#f9f9f9")
+    worker = get_worker(parent)
 
     # --- Title ---
     tk.Label(parent, text="🧾 Itens de Serviço", font=("Helvetica", 18, "bold"), bg="#f9f9f9", fg="#333").pack(pady=10)
@@ -38,7 +41,7 @@ def build_item_tab(parent):
         entry_price.delete(0, tk.END)
         entry_notes.delete("1.0", tk.END)
         selected_id.set("")
-        item_listbox.selection_clear(0, tk.END)
+        item_list.clear_selection()
 
     # Function to register a new item
     def register_item():
@@ -56,10 +59,16 @@ def build_item_tab(parent):
             messagebox.showwarning("⚠️ Atenção", "Preço inválido.")
             return
 
-        insert_item(name, price_float, notes)
-        messagebox.showinfo("✅ Sucesso", "Item cadastrado com sucesso!")
-        clear_fields()
-        list_items()
+        def on_success(_):
+            messagebox.showinfo("✅ Sucesso", "Item cadastrado com sucesso!")
+            clear_fields()
+            list_items()
+
+        worker.submit_write(
+            action_buttons, insert_item, name, price_float, notes,
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao cadastrar item: {str(e)}")
+        )
 
     # Function to update selected item
     def edit_item():
@@ -77,10 +86,16 @@ def build_item_tab(parent):
             messagebox.showwarning("⚠️ Atenção", "Preço inválido.")
             return
 
-        update_item(int(selected_id.get()), name, price_float, notes)
-        messagebox.showinfo("✏️ Atualizado", "Item atualizado com sucesso!")
-        clear_fields()
-        list_items()
+        def on_success(_):
+            messagebox.showinfo("✏️ Atualizado", "Item atualizado com sucesso!")
+            clear_fields()
+            list_items()
+
+        worker.submit_write(
+            action_buttons, update_item, int(selected_id.get()), name, price_float, notes,
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao editar item: {str(e)}")
+        )
 
     # Function to delete selected item
     def remove_item():
@@ -90,39 +105,42 @@ def build_item_tab(parent):
 
         confirm = messagebox.askyesno("🗑️ Confirmação", "Tem certeza que deseja excluir este item?")
         if confirm:
-            delete_item(int(selected_id.get()))
-            messagebox.showinfo("🗑️ Excluído", "Item excluído com sucesso!")
-            clear_fields()
-            list_items()
-
-    # Buttons with emojis and styling
-    tk.Button(button_frame, text="➕ Cadastrar", width=15, command=register_item, bg="#4CAF50", fg="white").grid(row=0, column=0, padx=5)
-    tk.Button(button_frame, text="✏️ Editar", width=15, command=edit_item, bg="#2196F3", fg="white").grid(row=0, column=1, padx=5)
-    tk.Button(button_frame, text="🗑️ Excluir", width=15, command=remove_item, bg="#f44336", fg="white").grid(row=0, column=2, padx=5)
-    tk.Button(button_frame, text="🧹 Limpar", width=15, command=clear_fields, bg="#9E9E9E", fg="white").grid(row=0, column=3, padx=5)
+            def on_success(_):
+                messagebox.showinfo("🗑️ Excluído", "Item excluído com sucesso!")
+                clear_fields()
+                list_items()
+
+            worker.submit_write(
+                action_buttons, delete_item, int(selected_id.get()),
+                on_success=on_success,
+                on_error=lambda e: messagebox.showerror("Erro", f"Erro ao excluir item: {str(e)}")
+            )
+
+    # Buttons with emojis and styling (disabled while a save is running)
+    action_buttons = [
+        tk.Button(button_frame, text="➕ Cadastrar", width=15, command=register_item, bg="#4CAF50", fg="white"),
+        tk.Button(button_frame, text="✏️ Editar", width=15, command=edit_item, bg="#2196F3", fg="white"),
+        tk.Button(button_frame, text="🗑️ Excluir", width=15, command=remove_item, bg="#f44336", fg="white"),
+        tk.Button(button_frame, text="🧹 Limpar", width=15, command=clear_fields, bg="#9E9E9E", fg="white"),
+    ]
+    for column, button in enumerate(action_buttons):
+        button.grid(row=0, column=column, padx=5)
 
     # --- Listbox section ---
     tk.Label(parent, text="📋 Itens cadastrados:", font=("Helvetica", 14), bg="#f9f9f9").pack(pady=10)
-    item_listbox = tk.Listbox(parent, width=80, height=10)
-    item_listbox.pack(pady=5)
+    item_list = VirtualList(parent, lambda item: f"{item[0]} - {item[1]} | R$ {item[2]:.2f}", width=80, height=10)
+    item_list.pack(pady=5)
 
-    # Function to list all items
+    # Function to list all items (queried on the worker; only the visible lines are drawn)
     def list_items():
-        items = get_all_items()
-        item_listbox.delete(0, tk.END)
-
-        for item in items:
-            texto = f"{item[0]} - {item[1]} | R$ {item[2]:.2f}"
-            item_listbox.insert(tk.END, texto)
+        worker.submit(get_cached_items, on_success=item_list.set_rows, key="item_tab.list")
 
     # Function to load selected item into form
     def on_select(event):
-        if not item_listbox.curselection():
+        item = item_list.selected_row()
+        if item is None:
             return
 
-        index = item_listbox.curselection()[0]
-        item = get_all_items()[index]
-
         selected_id.set(item[0])
         entry_name.delete(0, tk.END)
         entry_name.insert(0, item[1])
@@ -133,5 +151,5 @@ def build_item_tab(parent):
         entry_notes.delete("1.0", tk.END)
         entry_notes.insert("1.0", item[3])
 
-    item_listbox.bind("<<ListboxSelect>>", on_select)
+    item_list.bind("<<VirtualListSelect>>", on_select)
     list_items()
\ No newline at end of file
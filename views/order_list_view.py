@@ -1,11 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
 from typing import List, Tuple
 from utils.db_utils import (
-    get_all_orders, get_all_clients, get_order_items,
-    get_all_items, delete_order, delete_order_item
+    get_orders_filtered,
+    get_order_items, delete_orders,
+    get_clients_registry, get_items_registry, get_clients_prefix_index
 )
+from utils.date_utils import parse_date, iso_to_br
+from utils.db_worker import get_worker
+from utils.reports import order_report, with_previous_period, percent_change
+from utils.export import export_orders
+from widgets.paged_treeview import PagedTreeview
+from widgets.typeahead_combobox import TypeaheadCombobox
 
 
 class OrdersListTab:
@@ -15,13 +22,24 @@ class OrdersListTab:
         self.parent = parent
         self.parent.configure(bg="#f9f9f9")
 
-        self.client_list = get_all_clients()
-        self.item_list = get_all_items()
-        self.all_orders = []
+        self.current_filters = {}
+        self.worker = get_worker(parent)
+        self.export_worker = get_worker(parent, "export")
+        self._search_job = None
 
         self._setup_ui()
         self.load_orders()
 
+    @property
+    def clients(self):
+        """Clientes indexados por id e nome"""
+        return get_clients_registry()
+
+    @property
+    def items(self):
+        """Itens indexados por id e nome"""
+        return get_items_registry()
+
     def _setup_ui(self):
         """Configura a interface do usuário"""
         # --- Título ---
@@ -56,13 +74,12 @@ class OrdersListTab:
         # Filtro por cliente
         tk.Label(filter_frame, text="Cliente:", bg="#f9f9f9").grid(row=0, column=0, sticky="w", padx=5)
         self.client_filter_var = tk.StringVar()
-        client_options = ["Todos"] + [f"{c[0]} - {c[1]}" for c in self.client_list]
-        client_combo = ttk.Combobox(
-            filter_frame, textvariable=self.client_filter_var,
-            values=client_options, state="readonly", width=30
+        self.client_combo = TypeaheadCombobox(
+            filter_frame, get_clients_prefix_index, lambda c: f"{c[0]} - {c[1]}",
+            all_label="Todos", textvariable=self.client_filter_var, width=30
         )
-        client_combo.grid(row=0, column=1, padx=5, pady=2)
-        client_combo.set("Todos")
+        self.client_combo.grid(row=0, column=1, padx=5, pady=2)
+        self.client_combo.set("Todos")
 
         # Filtro por status
         tk.Label(filter_frame, text="Status:", bg="#f9f9f9").grid(row=0, column=2, sticky="w", padx=5)
@@ -88,9 +105,16 @@ class OrdersListTab:
         end_date_entry.grid(row=1, column=3, padx=5, pady=2)
         end_date_entry.insert(0, datetime.now().strftime("%d/%m/%Y"))
 
+        # Busca textual (observações da ordem ou dados do cliente)
+        tk.Label(filter_frame, text="Buscar:", bg="#f9f9f9").grid(row=2, column=0, sticky="w", padx=5)
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(filter_frame, textvariable=self.search_var, width=50)
+        search_entry.grid(row=2, column=1, columnspan=3, sticky="w", padx=5, pady=2)
+        search_entry.bind("<KeyRelease>", self._on_search_key)
+
         # Botões de filtro
         button_frame = tk.Frame(filter_frame, bg="#f9f9f9")
-        button_frame.grid(row=0, column=4, rowspan=2, padx=10)
+        button_frame.grid(row=0, column=4, rowspan=3, padx=10)
 
         tk.Button(
             button_frame, text="🔍 Aplicar Filtros",
@@ -138,6 +162,15 @@ class OrdersListTab:
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
+        # Carrega as ordens por páginas conforme a rolagem (keyset por data, id)
+        self.pager = PagedTreeview(
+            self.tree, scrollbar,
+            fetch_page=lambda **page: get_orders_filtered(**self.current_filters, **page),
+            format_row=self._format_order_row,
+            row_key=lambda order: (order[2], order[0]),
+            worker=self.worker
+        )
+
         # Bind selection event
         self.tree.bind("<<TreeviewSelect>>", self.on_order_select)
 
@@ -231,60 +264,67 @@ class OrdersListTab:
             width=15
         ).pack(side="left", padx=5)
 
+        self.export_button = tk.Button(
+            button_frame, text="📤 Exportar",
+            command=self.export_orders, bg="#607D8B", fg="white",
+            width=15
+        )
+        self.export_button.pack(side="left", padx=5)
+
+        # Progresso da exportação (visível só durante a exportação)
+        self.export_progress = ttk.Progressbar(button_frame, length=150, mode="determinate")
+        self.export_status = tk.Label(button_frame, bg="#f9f9f9")
+
     def load_orders(self):
-        """Carrega todas as ordens"""
-        self.all_orders = get_all_orders()
+        """Recarrega as ordens com os filtros atuais"""
         self.apply_filters()
 
     def apply_filters(self):
-        """Aplica os filtros selecionados"""
-        filtered_orders = self.all_orders.copy()
-
+        """Aplica os filtros selecionados direto na consulta SQL"""
         # Filtro por cliente
-        client_filter = self.client_filter_var.get()
-        if client_filter != "Todos":
-            client_id = int(client_filter.split(" - ")[0])
-            filtered_orders = [o for o in filtered_orders if o[1] == client_id]
+        client = self.client_combo.accept()
+        client_id = client[0] if client is not None else None
 
         # Filtro por status
         status_filter = self.status_filter_var.get()
-        if status_filter != "Todos":
-            filtered_orders = [o for o in filtered_orders if o[3] == status_filter]
+        status = status_filter if status_filter != "Todos" else None
+
+        # Filtro por data (datas inválidas são ignoradas)
+        start_date = self._parse_date(self.start_date_var.get())
+        end_date = self._parse_date(self.end_date_var.get())
+
+        self.current_filters = {
+            "client_id": client_id,
+            "status": status,
+            "date_from": start_date.strftime("%Y-%m-%d") if start_date else None,
+            "date_to": end_date.strftime("%Y-%m-%d") if end_date else None,
+            "search": self.search_var.get().strip() or None
+        }
 
-        # Filtro por data
-        try:
-            start_date = self._parse_date(self.start_date_var.get())
-            end_date = self._parse_date(self.end_date_var.get())
+        self.pager.reset()
 
-            if start_date and end_date:
-                filtered_orders = [
-                    o for o in filtered_orders
-                    if start_date <= self._parse_date(o[2]) <= end_date
-                ]
-        except:
-            pass  # Ignora erros de data
+    def _on_search_key(self, event):
+        """Reaplica os filtros quando a digitação pausa"""
+        if self._search_job is not None:
+            self.parent.after_cancel(self._search_job)
+        self._search_job = self.parent.after(250, self._run_search)
 
-        # 🔥 CORREÇÃO: Mudar para display_orders (sem o 'y')
-        self.display_orders(filtered_orders)
+    def _run_search(self):
+        self._search_job = None
+        self.apply_filters()
 
     def _parse_date(self, date_str):
-        """Converte string de data para objeto datetime"""
-        try:
-            return datetime.strptime(date_str, "%d/%m/%Y")
-        except:
-            try:
-                return datetime.strptime(date_str, "%Y-%m-%d")
-            except:
-                return None
+        """Converte a data digitada no filtro (None se inválida)"""
+        return parse_date(date_str)
 
     def display_order_details(self, order):
         """Exibe os detalhes da ordem selecionada"""
         # Informações básicas
-        client_name = next((c[1] for c in self.client_list if c[0] == order[1]), "Desconhecido")
+        client_name = self.clients.name(order[1])
 
         self.info_labels["id"].config(text=order[0])
         self.info_labels["client"].config(text=client_name)
-        self.info_labels["date"].config(text=order[2])
+        self.info_labels["date"].config(text=iso_to_br(order[2]))
         self.info_labels["status"].config(text=order[3])
         self.info_labels["delivery"].config(text=order[4])
         self.info_labels["notes"].config(text=order[5] or "Nenhuma")
@@ -293,8 +333,20 @@ class OrdersListTab:
         for item in self.items_tree.get_children():
             self.items_tree.delete(item)
 
-        order_items = get_order_items(order[0])
-        total_order = 0
+        # Total mantido pelo banco (orders.total)
+        self.total_label.config(text=f"💰 Total da Ordem: R$ {order[8]:.2f}")
+
+        # Linhas carregadas fora da thread do Tk; só a última seleção é exibida
+        self.worker.submit(
+            get_order_items, order[0],
+            on_success=self._show_order_items,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao carregar itens da ordem: {str(e)}"),
+            key="orders_list.order_items"
+        )
+
+    def _show_order_items(self, order_items):
+        """Exibe os itens da ordem carregados pelo worker"""
+        items = self.items
 
         # 🔥 CORREÇÃO: Usar a ordem correta das colunas
         for item in order_items:
@@ -303,9 +355,8 @@ class OrdersListTab:
             qty = item[2]  # Quantidade
             unit_price = item[3]  # Preço unitário
 
-            item_name = next((i[1] for i in self.item_list if i[0] == item_id), "Desconhecido")
+            item_name = items.name(item_id)
             subtotal = qty * unit_price
-            total_order += subtotal
 
             self.items_tree.insert("", "end", values=(
                 item_name,
@@ -314,14 +365,13 @@ class OrdersListTab:
                 f"R$ {subtotal:.2f}"
             ))
 
-        self.total_label.config(text=f"💰 Total da Ordem: R$ {total_order:.2f}")
-
     def clear_filters(self):
         """Limpa todos os filtros"""
         self.client_filter_var.set("Todos")
         self.status_filter_var.set("Todos")
         self.start_date_var.set((datetime.now() - timedelta(days=30)).strftime("%d/%m/%Y"))
         self.end_date_var.set(datetime.now().strftime("%d/%m/%Y"))
+        self.search_var.set("")
         self.load_orders()
 
     def on_order_select(self, event):
@@ -330,65 +380,46 @@ class OrdersListTab:
         if not selection:
             return
 
-        item = self.tree.item(selection[0])
-        order_id = item['values'][0]
-
         # Encontra a ordem completa
-        order = next((o for o in self.all_orders if o[0] == order_id), None)
+        order = self.pager.get_row(selection[0])
         if not order:
             return
 
         self.display_order_details(order)
 
-    def display_orders(self, orders):
-        """Exibe as ordens na treeview"""
-        # Limpa a treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        client_dict = {c[0]: c[1] for c in self.client_list}
-
-        for order in orders:
-            # Calcula o total da ordem
-            order_items = get_order_items(order[0])
-            total = sum(qty * price for _, _, qty, price in order_items)
-
-            self.tree.insert("", "end", values=(
-                order[0],  # ID
-                client_dict.get(order[1], "Desconhecido"),  # Cliente
-                order[2],  # Data
-                order[3],  # Status
-                order[4],  # Método de entrega
-                f"R$ {total:.2f}"  # Total
-            ))
+    def _format_order_row(self, order):
+        """Valores exibidos na treeview para uma ordem"""
+        return (
+            order[0],  # ID
+            order[7] or "Desconhecido",  # Cliente
+            iso_to_br(order[2]),  # Data
+            order[3],  # Status
+            order[4],  # Método de entrega
+            f"R$ {order[8]:.2f}"  # Total
+        )
 
     def delete_selected_order(self):
-        """Exclui a ordem selecionada"""
+        """Exclui as ordens selecionadas"""
         selection = self.tree.selection()
         if not selection:
             messagebox.showwarning("⚠️", "Selecione uma ordem para excluir.")
             return
 
-        item = self.tree.item(selection[0])
-        order_id = item['values'][0]
-        client_name = item['values'][1]
+        order_ids = [self.tree.item(iid)['values'][0] for iid in selection]
+        if len(order_ids) == 1:
+            client_name = self.tree.item(selection[0])['values'][1]
+            pergunta = f"Tem certeza que deseja excluir a ordem {order_ids[0]} do cliente {client_name}?\n"
+        else:
+            pergunta = f"Tem certeza que deseja excluir as {len(order_ids)} ordens selecionadas?\n"
 
         if messagebox.askyesno(
                 "🗑️ Confirmar Exclusão",
-                f"Tem certeza que deseja excluir a ordem {order_id} do cliente {client_name}?\n"
-                "Esta ação não pode ser desfeita."
+                pergunta + "Esta ação não pode ser desfeita."
         ):
-            try:
-                # Remove os itens da ordem primeiro
-                order_items = get_order_items(order_id)
-                for item_id, _, _, _ in order_items:
-                    delete_order_item(item_id)
-
-                # Remove a ordem
-                delete_order(order_id)
-
-                messagebox.showinfo("✅", "Ordem excluída com sucesso!")
-                self.load_orders()
+            def on_success(_):
+                messagebox.showinfo("✅", "Ordem excluída com sucesso!" if len(order_ids) == 1
+                                    else "Ordens excluídas com sucesso!")
+                self.pager.refresh()
 
                 # Limpa os detalhes
                 for label in self.info_labels.values():
@@ -397,40 +428,100 @@ class OrdersListTab:
                     self.items_tree.delete(item)
                 self.total_label.config(text="💰 Total da Ordem: R$ 0.00")
 
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao excluir ordem: {str(e)}")
+            # Remove as ordens; os itens são removidos em cascata
+            self.worker.submit(
+                delete_orders, order_ids,
+                on_success=on_success,
+                on_error=lambda e: messagebox.showerror("Erro", f"Erro ao excluir ordem: {str(e)}")
+            )
 
-    def generate_report(self):
-        """Gera um relatório simples das ordens"""
-        total_orders = len(self.tree.get_children())
-        if total_orders == 0:
-            messagebox.showinfo("📊 Relatório", "Nenhuma ordem para gerar relatório.")
+    def export_orders(self):
+        """Exporta as ordens do filtro atual, com seus itens, para CSV ou XLSX"""
+        path = filedialog.asksaveasfilename(
+            title="Exportar ordens",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx")]
+        )
+        if not path:
             return
 
-        # Calcula totais
-        total_value = 0
-        status_count = {}
+        self.export_button.config(state="disabled")
+        self.export_progress["value"] = 0
+        self.export_progress.pack(side="left", padx=5)
+        self.export_status.config(text="Exportando...")
+        self.export_status.pack(side="left", padx=5)
+
+        # A exportação roda no worker de exportação; o progresso volta à thread do Tk
+        worker = self.export_worker
+        self.export_worker.submit(
+            export_orders, path, dict(self.current_filters),
+            lambda done, total: worker.call_soon(self._on_export_progress, done, total),
+            on_success=lambda count: self._on_export_done(f"✅ {count} linhas exportadas para:\n{path}"),
+            on_error=self._on_export_error
+        )
+
+    def _on_export_progress(self, done, total):
+        self.export_progress["maximum"] = max(total, 1)
+        self.export_progress["value"] = done
+        self.export_status.config(text=f"{done}/{total}")
+
+    def _on_export_done(self, message):
+        self.export_progress.pack_forget()
+        self.export_status.pack_forget()
+        self.export_button.config(state="normal")
+        messagebox.showinfo("📤 Exportação", message)
+
+    def _on_export_error(self, error):
+        self.export_progress.pack_forget()
+        self.export_status.pack_forget()
+        self.export_button.config(state="normal")
+        if isinstance(error, ImportError):
+            messagebox.showerror("Erro", "Instale o openpyxl para exportar em XLSX.")
+        else:
+            messagebox.showerror("Erro", f"Erro ao exportar: {str(error)}")
 
-        for item in self.tree.get_children():
-            order_data = self.tree.item(item)['values']
-            total_value += float(order_data[5].replace("R$ ", "").replace(",", ""))
-            status = order_data[3]
-            status_count[status] = status_count.get(status, 0) + 1
+    def generate_report(self):
+        """Gera um relatório das ordens do filtro atual, comparado ao período anterior"""
+        # Totais calculados no SQL sobre todo o filtro, não só as páginas carregadas
+        self.worker.submit(
+            with_previous_period, order_report, dict(self.current_filters),
+            on_success=self._show_report,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao gerar relatório: {str(e)}")
+        )
+
+    def _show_report(self, reports):
+        current, previous = reports
+        if current["count"] == 0:
+            messagebox.showinfo("📊 Relatório", "Nenhuma ordem para gerar relatório.")
+            return
 
         report = f"""
 📊 RELATÓRIO DE ORDENS
 
-📈 Total de Ordens: {total_orders}
-💰 Valor Total: R$ {total_value:.2f}
+📈 Total de Ordens: {current["count"]}
+💰 Valor Total: R$ {current["total"]:.2f}
 
 📋 Distribuição por Status:
 """
-        for status, count in status_count.items():
-            report += f"   • {status}: {count} ordens\n"
+        for status, (count, total) in current["by_status"].items():
+            report += f"   • {status}: {count} ordens (R$ {total:.2f})\n"
+
+        if previous is not None:
+            report += f"""
+🔁 Período Anterior:
+   • Ordens: {previous["count"]}{_format_change(current["count"], previous["count"])}
+   • Valor: R$ {previous["total"]:.2f}{_format_change(current["total"], previous["total"])}
+"""
 
         messagebox.showinfo("📊 Relatório de Ordens", report)
 
 
+def _format_change(current, previous):
+    """Variação percentual para o relatório (vazia se não há base)"""
+    change = percent_change(current, previous)
+    return "" if change is None else f" ({change:+.1f}%)"
+
+
 def build_orders_list_tab(parent):
     """Função principal para construir a aba de lista de ordens"""
     return OrdersListTab(parent)
\ No newline at end of file
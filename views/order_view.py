@@ -1,13 +1,20 @@
+import logging
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from typing import List, Tuple, Optional
 from utils.db_utils import (
-    insert_order, get_all_orders, update_order, delete_order,
-    get_all_clients, get_all_items, get_order_items,
-    insert_order_item, delete_order_item
+    get_all_orders, delete_order, save_order_with_items,
+    get_cached_clients, get_cached_items, get_order_items,
+    get_clients_registry, get_items_registry, get_clients_prefix_index, get_items_prefix_index
 )
 from utils.constants import ORDER_STATUS, DELIVERY_METHODS
+from utils.date_utils import br_to_iso, iso_to_br
+from utils.db_worker import get_worker
+from widgets.typeahead_combobox import TypeaheadCombobox
+from widgets.virtual_list import VirtualList
+
+logger = logging.getLogger(__name__)
 
 class OrderTab:
     """Classe para gerenciar a aba de cadastro de ordens de serviço"""
@@ -17,36 +24,41 @@ class OrderTab:
         self.parent.configure(bg="#f9f9f9")
 
         self.selected_id = tk.StringVar()
-        self.temp_items: List[Tuple[int, int, float]] = []
-
-        # Carregar dados
-        self.client_list = get_all_clients()
-        self.item_list = get_all_items()
-
-        # Debug detalhado dos itens
-        print("=== CARREGAMENTO DE ITENS ===")
-        print(f"Total de clientes: {len(self.client_list)}")
-        print(f"Total de itens: {len(self.item_list)}")
+        self.worker = get_worker(parent)
+        # Linhas em edição: (id em order_items ou None se nova, item_id, qtd, preço)
+        self.temp_items: List[Tuple[Optional[int], int, int, float]] = []
+        # True enquanto os itens da ordem selecionada ainda estão sendo carregados
+        self._loading_items = False
 
+        logger.debug("Carregados %d clientes e %d itens", len(self.client_list), len(self.item_list))
         if not self.item_list:
-            print("⚠️ AVISO: Lista de itens está VAZIA!")
-        else:
-            print("Itens carregados:")
-            for i, item in enumerate(self.item_list):
-                print(
-                    f"  {i + 1:2d}. ID: {item[0]:3d} | Nome: '{item[1]:20}' | Preço: R$ {item[2]:8.2f} | Notas: '{item[3]}'")
-
-        # Debug dos clientes
+            logger.warning("Lista de itens está vazia")
         if not self.client_list:
-            print("⚠️ AVISO: Lista de clientes está VAZIA!")
-        else:
-            print("Clientes carregados:")
-            for i, client in enumerate(self.client_list[:3]):  # Mostrar só os 3 primeiros
-                print(f"  {i + 1:2d}. ID: {client[0]:3d} | Nome: '{client[1]:20}'")
+            logger.warning("Lista de clientes está vazia")
 
         self._setup_ui()
         self.list_orders()
 
+    @property
+    def client_list(self):
+        """Clientes do cache compartilhado (recarregado só após alterações)"""
+        return get_cached_clients()
+
+    @property
+    def item_list(self):
+        """Itens do cache compartilhado (recarregado só após alterações)"""
+        return get_cached_items()
+
+    @property
+    def clients(self):
+        """Clientes indexados por id e nome"""
+        return get_clients_registry()
+
+    @property
+    def items(self):
+        """Itens indexados por id e nome"""
+        return get_items_registry()
+
     def _setup_ui(self):
         """Configura a interface do usuário"""
         # --- Título ---
@@ -75,14 +87,13 @@ class OrderTab:
         form_frame = tk.Frame(self.parent, bg="#f9f9f9")
         form_frame.pack(pady=10, fill="x", padx=20)
 
-        # Cliente
-        client_options = [f"{c[0]} - {c[1]}" for c in self.client_list]
+        # Cliente (autocompletar por nome ou telefone)
         self.client_var = tk.StringVar()
-        self._create_form_field(
-            form_frame, "Cliente:", 0,
-            ttk.Combobox(form_frame, textvariable=self.client_var,
-                         values=client_options, state="readonly", width=40)
+        self.client_combo = TypeaheadCombobox(
+            form_frame, get_clients_prefix_index, lambda c: f"{c[0]} - {c[1]}",
+            textvariable=self.client_var, width=40
         )
+        self._create_form_field(form_frame, "Cliente:", 0, self.client_combo)
 
         # Data
         self.entry_date = tk.Entry(form_frame, width=40)
@@ -132,20 +143,19 @@ class OrderTab:
         )
         item_frame.pack(pady=10, fill="x", padx=20)
 
-        # Seleção de item
-        item_options = [f"{i[0]} - {i[1]} (R${i[2]:.2f})" for i in self.item_list]
+        # Seleção de item (autocompletar por nome)
         self.item_var = tk.StringVar()
 
         tk.Label(item_frame, text="Item de Serviço:", bg="#f9f9f9").grid(
             row=0, column=0, sticky="w", padx=5
         )
-        self.item_combo = ttk.Combobox(
-            item_frame, textvariable=self.item_var,
-            values=item_options, state="readonly", width=40
+        self.item_combo = TypeaheadCombobox(
+            item_frame, get_items_prefix_index, lambda i: f"{i[0]} - {i[1]} (R${i[2]:.2f})",
+            textvariable=self.item_var, width=40
         )
         self.item_combo.grid(row=0, column=1, padx=5)
-        if item_options:
-            self.item_combo.set(item_options[0])
+        if self.item_list:
+            self.item_combo.set_row(self.item_list[0])
 
         # Quantidade
         tk.Label(item_frame, text="Quantidade:", bg="#f9f9f9").grid(
@@ -194,11 +204,15 @@ class OrderTab:
             ("🧹 Limpar", self.clear_fields, "#FF9800")
         ]
 
+        # Desabilitados enquanto uma gravação está em andamento (evita cliques duplos)
+        self.action_buttons = []
         for text, command, color in buttons:
-            tk.Button(
+            button = tk.Button(
                 button_frame, text=text, command=command,
                 bg=color, fg="white", width=15
-            ).pack(side="left", padx=5)
+            )
+            button.pack(side="left", padx=5)
+            self.action_buttons.append(button)
 
     def _create_orders_list(self):
         """Cria a lista de ordens cadastradas"""
@@ -207,22 +221,21 @@ class OrderTab:
             bg="#f9f9f9", font=("Helvetica", 10, "bold")
         ).pack(pady=(20, 5))
 
-        self.order_listbox = tk.Listbox(self.parent, width=80, height=8)
-        self.order_listbox.pack(pady=5, padx=20)
-        self.order_listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.order_list = VirtualList(self.parent, self._format_order, width=80, height=8, bg="#f9f9f9")
+        self.order_list.pack(pady=5, padx=20)
+        self.order_list.bind("<<VirtualListSelect>>", self.on_select)
 
     def format_date_br_to_iso(self, date_str: str) -> Optional[str]:
         """Converte data do formato BR para ISO"""
         try:
-            d, m, y = date_str.split("/")
-            return f"{y}-{m}-{d}"
+            return br_to_iso(date_str)
         except ValueError:
             messagebox.showerror("Erro", "Formato de data inválido. Use DD/MM/AAAA")
             return None
 
     def validate_form(self) -> bool:
         """Valida os dados do formulário"""
-        if not self.client_var.get():
+        if self.client_combo.accept() is None:
             messagebox.showwarning("⚠️", "Selecione um cliente.")
             return False
 
@@ -241,40 +254,22 @@ class OrderTab:
         self.item_listbox.delete(0, tk.END)
         total = 0.0
 
-        print(f"=== LISTANDO ITENS TEMPORÁRIOS ===")  # Debug
-        print(f"Total de itens na temp_items: {len(self.temp_items)}")  # Debug
-        print(f"Total de itens na item_list: {len(self.item_list)}")  # Debug
-
-        for i, item in enumerate(self.item_list):
-            print(f"Item {i}: ID={item[0]}, Nome='{item[1]}', Preço={item[2]}")  # Debug
-
-        for item_id, qtd, preco in self.temp_items:
-            print(f"Buscando item ID {item_id}...")  # Debug
+        items = self.items
 
+        for _, item_id, qtd, preco in self.temp_items:
             # Buscar o nome do item
-            nome = "Desconhecido"
-            for item in self.item_list:
-                if item[0] == item_id:
-                    nome = item[1]
-                    print(f"Item encontrado: {nome}")  # Debug
-                    break
-            else:
-                print(f"Item ID {item_id} NÃO encontrado!")  # Debug
+            nome = items.name(item_id)
 
             subtotal = qtd * preco
             total += subtotal
             texto = f"{nome} | Qtd: {qtd} | Unit: R${preco:.2f} | Subtotal: R${subtotal:.2f}"
             self.item_listbox.insert(tk.END, texto)
-            print(f"Item listado: {texto}")  # Debug
 
         self.total_label.config(text=f"💰 Total: R$ {total:.2f}")
-        print(f"Total calculado: R$ {total:.2f}")  # Debug
 
     def add_item_to_temp(self):
         """Adiciona item à lista temporária"""
-        print("=== INICIANDO ADIÇÃO DE ITEM ===")
-
-        if not self.item_var.get():
+        if self.item_combo.accept() is None:
             messagebox.showwarning("⚠️", "Selecione um item da lista.")
             return
 
@@ -286,7 +281,6 @@ class OrderTab:
         try:
             # Extrair ID do item
             item_text = self.item_var.get()
-            print(f"Texto do item selecionado: '{item_text}'")
 
             # Verificar se o texto tem o formato esperado
             if " - " not in item_text:
@@ -294,50 +288,35 @@ class OrderTab:
                 return
 
             item_id_str = item_text.split(" - ")[0]
-            print(f"ID extraído como string: '{item_id_str}'")
 
             item_id = int(item_id_str)
             qtd = int(qtd_text)
 
-            print(f"Item ID: {item_id}, Quantidade: {qtd}")
-
             if qtd <= 0:
                 messagebox.showwarning("⚠️", "A quantidade deve ser maior que zero.")
                 return
 
             # Buscar preço e nome do item para verificação
-            preco = 0
-            nome_item = "Não encontrado"
-            item_encontrado = False
-
-            for item in self.item_list:
-                if item[0] == item_id:
-                    preco = item[2]
-                    nome_item = item[1]
-                    item_encontrado = True
-                    print(f"Item encontrado na base: '{nome_item}' - R$ {preco:.2f}")
-                    break
-
-            if not item_encontrado:
+            items = self.items
+            item = items.get(item_id)
+
+            if item is None:
                 # Tentar encontrar por nome (fallback)
                 nome_procurado = item_text.split(" - ")[1].split(" (R$")[0]
-                for item in self.item_list:
-                    if item[1] == nome_procurado:
-                        item_id = item[0]  # Corrigir o ID
-                        preco = item[2]
-                        nome_item = item[1]
-                        item_encontrado = True
-                        print(f"Item encontrado por nome: '{nome_item}' - ID: {item_id} - R$ {preco:.2f}")
-                        break
-
-            if not item_encontrado:
+                item = items.get(items.id_for_name(nome_procurado))
+                if item is not None:
+                    logger.debug("Item encontrado por nome: '%s' - ID: %s", item[1], item[0])
+
+            if item is None:
                 messagebox.showerror("Erro", f"Item não encontrado na base de dados. ID: {item_id}")
                 return
 
+            item_id, nome_item, preco = item[0], item[1], item[2]
+
             # Adicionar à lista temporária
-            novo_item = (item_id, qtd, preco)
+            novo_item = (None, item_id, qtd, preco)  # Linha nova, ainda sem id
             self.temp_items.append(novo_item)
-            print(f"Item adicionado à lista: ID={item_id}, Nome='{nome_item}', Qtd={qtd}, Preço={preco}")
+            logger.debug("Item adicionado: ID=%s, Nome='%s', Qtd=%s, Preço=%s", item_id, nome_item, qtd, preco)
 
             # Resetar campos
             self.entry_qty.delete(0, tk.END)
@@ -346,15 +325,13 @@ class OrderTab:
             # Atualizar lista visual
             self.list_temp_items()
 
-            print("=== ITEM ADICIONADO COM SUCESSO ===")
-
         except ValueError as e:
             error_msg = f"Erro ao processar dados: {str(e)}"
-            print(f"ERRO: {error_msg}")
+            logger.error(error_msg)
             messagebox.showerror("Erro", error_msg)
         except Exception as e:
             error_msg = f"Erro inesperado: {str(e)}"
-            print(f"ERRO INESPERADO: {error_msg}")
+            logger.exception(error_msg)
             messagebox.showerror("Erro", error_msg)
 
     def remove_item_from_temp(self):
@@ -376,10 +353,11 @@ class OrderTab:
         self.delivery_var.set(DELIVERY_METHODS[0] if DELIVERY_METHODS else "")
         self.entry_notes.delete("1.0", tk.END)
         self.selected_id.set("")
+        self._loading_items = False
         self.temp_items.clear()
         self.item_listbox.delete(0, tk.END)
         self.total_label.config(text="💰 Total: R$ 0.00")
-        self.order_listbox.selection_clear(0, tk.END)
+        self.order_list.clear_selection()
 
     def register_order(self):
         """Cadastra uma nova ordem"""
@@ -392,26 +370,30 @@ class OrderTab:
 
         try:
             client_id = int(self.client_var.get().split(" - ")[0])
-            status = self.status_var.get()
-            delivery = self.delivery_var.get()
-            notes = self.entry_notes.get("1.0", tk.END).strip()
-
-            # 🔥 INSERE A ORDEM E PEGA O ID
-            ordem_id = insert_order(client_id, date_iso, status, delivery, notes)
-            print(f"Ordem criada com ID: {ordem_id}")  # Debug
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Erro ao cadastrar ordem: {str(e)}")
+            return
 
-            # 🔥 INSERE OS ITENS DA ORDEM
-            for item_id, qtd, preco in self.temp_items:
-                print(f"Adicionando item: {item_id}, qtd: {qtd}, preco: {preco}")  # Debug
-                insert_order_item(ordem_id, item_id, qtd, preco)
+        status = self.status_var.get()
+        delivery = self.delivery_var.get()
+        notes = self.entry_notes.get("1.0", tk.END).strip()
 
+        def on_success(ordem_id):
+            logger.debug("Ordem criada com ID: %s", ordem_id)
             self.list_orders()
             self.clear_fields()
             messagebox.showinfo("✅", "Ordem cadastrada com sucesso!")
 
-        except Exception as e:
+        def on_error(e):
+            logger.error("Erro ao cadastrar ordem", exc_info=e)
             messagebox.showerror("Erro", f"Erro ao cadastrar ordem: {str(e)}")
-            print(f"Erro detalhado: {e}")  # Debug
+
+        # 🔥 INSERE A ORDEM E OS ITENS EM UMA ÚNICA TRANSAÇÃO (fora da thread do Tk)
+        self.worker.submit_write(
+            self.action_buttons, save_order_with_items,
+            None, client_id, date_iso, status, delivery, notes, list(self.temp_items),
+            on_success=on_success, on_error=on_error
+        )
 
     def edit_order(self):
         """Edita uma ordem existente"""
@@ -419,6 +401,11 @@ class OrderTab:
             messagebox.showwarning("⚠️", "Selecione uma ordem para editar.")
             return
 
+        # Salvar sem os itens carregados apagaria as linhas da ordem
+        if self._loading_items:
+            messagebox.showwarning("⚠️", "Aguarde o carregamento dos itens da ordem.")
+            return
+
         if not self.validate_form():
             return
 
@@ -429,29 +416,26 @@ class OrderTab:
         try:
             ordem_id = int(self.selected_id.get())
             client_id = int(self.client_var.get().split(" - ")[0])
-            status = self.status_var.get()
-            delivery = self.delivery_var.get()
-            notes = self.entry_notes.get("1.0", tk.END).strip()
-
-            # Atualiza ordem
-            update_order(ordem_id, client_id, date_iso, status, delivery, notes)
-
-            # 🔥 CORREÇÃO: Remove os itens antigos corretamente
-            order_items = get_order_items(ordem_id)
-            for item in order_items:
-                item_id = item[0]  # 🔥 Aqui é o ID do order_item, não do item!
-                delete_order_item(item_id)
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Erro ao editar ordem: {str(e)}")
+            return
 
-            # Adiciona os novos itens
-            for item_id, qtd, preco in self.temp_items:
-                insert_order_item(ordem_id, item_id, qtd, preco)
+        status = self.status_var.get()
+        delivery = self.delivery_var.get()
+        notes = self.entry_notes.get("1.0", tk.END).strip()
 
+        def on_success(_):
             self.list_orders()
             self.clear_fields()
             messagebox.showinfo("✏️", "Ordem e itens atualizados com sucesso!")
 
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao editar ordem: {str(e)}")
+        # Atualiza ordem e aplica só as alterações dos itens, atomicamente
+        self.worker.submit_write(
+            self.action_buttons, save_order_with_items,
+            ordem_id, client_id, date_iso, status, delivery, notes, list(self.temp_items),
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Erro", f"Erro ao editar ordem: {str(e)}")
+        )
 
     def remove_order(self):
         """Remove uma ordem"""
@@ -463,85 +447,97 @@ class OrderTab:
                 "🗑️ Confirmar Exclusão",
                 "Tem certeza que deseja excluir esta ordem?\nEsta ação não pode ser desfeita."
         ):
-            try:
-                delete_order(int(self.selected_id.get()))
+            def on_success(_):
                 self.list_orders()
                 self.clear_fields()
                 messagebox.showinfo("🗑️", "Ordem excluída com sucesso.")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao excluir ordem: {str(e)}")
+
+            self.worker.submit_write(
+                self.action_buttons, delete_order, int(self.selected_id.get()),
+                on_success=on_success,
+                on_error=lambda e: messagebox.showerror("Erro", f"Erro ao excluir ordem: {str(e)}")
+            )
 
     def list_orders(self):
-        """Lista todas as ordens cadastradas"""
-        orders = get_all_orders()
-        self.order_listbox.delete(0, tk.END)
+        """Lista todas as ordens cadastradas (consulta fora da thread do Tk)"""
+        self.worker.submit(get_all_orders, on_success=self._show_orders, key="order_tab.list_orders")
 
-        client_dict = {c[0]: c[1] for c in self.client_list}
+    def _show_orders(self, orders):
+        """Atualiza a lista com as ordens carregadas (só as linhas visíveis são desenhadas)"""
+        self.order_list.set_rows(orders)
 
-        for order in orders:
-            texto = f"{order[0]} - {client_dict.get(order[1], 'Desconhecido')} | {order[2]} | {order[3]} | {order[4]}"
-            self.order_listbox.insert(tk.END, texto)
+    def _format_order(self, order):
+        """Texto de uma ordem na lista"""
+        return f"{order[0]} - {self.clients.name(order[1])} | {iso_to_br(order[2])} | {order[3]} | {order[4]}"
 
     def on_select(self, event):
         """Manipula a seleção de uma ordem na lista - AGORA MOSTRA OS ITENS CORRETAMENTE"""
-        if not self.order_listbox.curselection():
+        order = self.order_list.selected_row()
+        if order is None:
             return
 
         try:
-            index = self.order_listbox.curselection()[0]
-            orders = get_all_orders()
-
-            if index >= len(orders):
-                messagebox.showerror("Erro", "Índice da ordem inválido.")
-                return
-
-            order = orders[index]
 
-            print(f"=== SELECIONANDO ORDEM ===")
-            print(f"Ordem ID: {order[0]}")
-            print(f"Cliente ID: {order[1]}")
-            print(f"Data: {order[2]}")
-            print(f"Status: {order[3]}")
+            logger.debug("Selecionando ordem %s (cliente %s, data %s, status %s)",
+                         order[0], order[1], order[2], order[3])
 
             self.selected_id.set(order[0])
 
             # Preenche dados do cliente
-            client_name = next(
-                (c[1] for c in self.client_list if c[0] == order[1]),
-                "Desconhecido"
-            )
-            self.client_var.set(f"{order[1]} - {client_name}")
+            client = self.clients.get(order[1])
+            if client is not None:
+                self.client_combo.set_row(client)
+            else:
+                self.client_var.set("")
 
             # Preenche outros campos
             self.entry_date.delete(0, tk.END)
-            self.entry_date.insert(0, order[2])
+            self.entry_date.insert(0, iso_to_br(order[2]))
             self.status_var.set(order[3])
             self.delivery_var.set(order[4])
             self.entry_notes.delete("1.0", tk.END)
             self.entry_notes.insert("1.0", order[5] or "")
 
-            # 🔥🔥🔥 CORREÇÃO PRINCIPAL: Carrega itens da ordem selecionada
+            # 🔥🔥🔥 CORREÇÃO PRINCIPAL: Carrega itens da ordem selecionada (fora da thread do Tk)
             self.temp_items.clear()
-            order_items = get_order_items(order[0])  # order[0] é o ID da ordem
-
-            print(f"Carregando {len(order_items)} itens da ordem {order[0]}:")
-            for i, item in enumerate(order_items):
-                # 🔥 ORDEM CORRETA: (id_do_registro, item_id, quantity, unit_price)
-                registro_id = item[0]  # ID do registro na tabela order_items (não usamos)
-                item_id = item[1]  # ID do item de serviço
-                qtd = item[2]  # Quantidade
-                preco = item[3]  # Preço unitário
-
-                print(f"  Item {i + 1}: Registro_ID={registro_id}, Item_ID={item_id}, Qtd={qtd}, Preço={preco}")
-                self.temp_items.append((item_id, qtd, preco))
-
-            print(f"Total de itens carregados: {len(self.temp_items)}")
             self.list_temp_items()
+            self._loading_items = True
+            self.worker.submit(
+                get_order_items, order[0],  # order[0] é o ID da ordem
+                on_success=lambda order_items: self._show_order_items(order[0], order_items),
+                on_error=self._on_order_items_error,
+                key="order_tab.order_items"
+            )
 
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao carregar ordem: {str(e)}")
-            import traceback
-            print(f"Erro detalhado: {traceback.format_exc()}")
+            logger.exception("Erro ao carregar ordem")
+
+    def _show_order_items(self, order_id, order_items):
+        """Preenche os itens da ordem carregados pelo worker"""
+        # Ignora o resultado se o formulário já mostra outra ordem (ou foi limpo)
+        if self.selected_id.get() != str(order_id):
+            return
+
+        self._loading_items = False
+        self.temp_items.clear()
+        for item in order_items:
+            # 🔥 ORDEM CORRETA: (id_do_registro, item_id, quantity, unit_price)
+            registro_id = item[0]  # ID do registro, usado para salvar só o que mudou
+            item_id = item[1]  # ID do item de serviço
+            qtd = item[2]  # Quantidade
+            preco = item[3]  # Preço unitário
+
+            self.temp_items.append((registro_id, item_id, qtd, preco))
+
+        logger.debug("Carregados %d itens da ordem %s", len(self.temp_items), order_id)
+        self.list_temp_items()
+
+    def _on_order_items_error(self, e):
+        # Sem os itens a ordem não pode ser editada com segurança
+        self.clear_fields()
+        messagebox.showerror("Erro", f"Erro ao carregar itens da ordem: {str(e)}")
+        logger.error("Erro ao carregar itens da ordem", exc_info=e)
 
 def build_order_tab(parent):
     """Função principal para construir a aba de cadastro de ordens"""
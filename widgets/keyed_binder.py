@@ -0,0 +1,159 @@
+import tkinter as tk
+
+
+class _KeyedBinder:
+    """Base comum: mantém a ordem das chaves exibidas e aplica só as diferenças.
+
+    update(rows) compara a lista nova com a exibida e faz apenas as remoções,
+    inserções, movimentações e atualizações necessárias, em vez de apagar e
+    reinserir tudo. A seleção e a posição de rolagem ficam onde estavam.
+    """
+
+    def __init__(self, widget, format_row, row_id=lambda row: row[0]):
+        self.widget = widget
+        self.format_row = format_row
+        self.row_id = row_id
+
+        self.keys = []     # chaves na ordem exibida
+        self.rows = {}     # chave -> linha
+        self.values = {}   # chave -> valores formatados exibidos
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get_row(self, key):
+        return self.rows.get(key)
+
+    def update(self, rows):
+        """Sincroniza o widget com rows (já na ordem desejada)"""
+        top_key = self._top_key()
+        selected = self._selected_keys()
+
+        new_keys = [self.key(row) for row in rows]
+        wanted = set(new_keys)
+
+        # Remoções
+        removed = [key for key in self.keys if key not in wanted]
+        if removed:
+            self.remove(removed)
+
+        # Inserções, movimentações e atualizações, na ordem final
+        for index, (key, row) in enumerate(zip(new_keys, rows)):
+            values = self.format_row(row)
+            self.rows[key] = row
+
+            if index < len(self.keys) and self.keys[index] == key:
+                if self.values[key] != values:
+                    self.values[key] = values
+                    self._update_item(index, key, values)
+                continue
+
+            if key in self.values:
+                old_index = self.keys.index(key)
+                del self.keys[old_index]
+                self._move_item(old_index, index, key, values)
+            else:
+                self._insert_item(index, key, values)
+            self.keys.insert(index, key)
+            self.values[key] = values
+
+        self._restore(top_key, selected)
+
+    def insert(self, rows, index=None):
+        """Insere linhas novas a partir de index (fim por padrão)"""
+        index = len(self.keys) if index is None else index
+        for offset, row in enumerate(rows):
+            key = self.key(row)
+            values = self.format_row(row)
+            self._insert_item(index + offset, key, values)
+            self.keys.insert(index + offset, key)
+            self.rows[key] = row
+            self.values[key] = values
+
+    def remove(self, keys):
+        """Remove as linhas com as chaves dadas"""
+        keys = set(keys)
+        for index in range(len(self.keys) - 1, -1, -1):
+            if self.keys[index] in keys:
+                self._delete_item(index, self.keys[index])
+                del self.keys[index]
+        for key in keys:
+            self.rows.pop(key, None)
+            self.values.pop(key, None)
+
+    def clear(self):
+        self.remove(list(self.keys))
+
+    def key(self, row):
+        return str(self.row_id(row))
+
+    def _top_key(self):
+        if not self.keys:
+            return None
+        first = int(round(self.widget.yview()[0] * len(self.keys)))
+        return self.keys[min(first, len(self.keys) - 1)]
+
+
+class TreeviewBinder(_KeyedBinder):
+    """Binder para ttk.Treeview; a chave da linha é o iid do item"""
+
+    def _insert_item(self, index, key, values):
+        self.widget.insert("", index, iid=key, values=values)
+
+    def _update_item(self, index, key, values):
+        self.widget.item(key, values=values)
+
+    def _move_item(self, old_index, index, key, values):
+        self.widget.move(key, "", index)
+        if self.values[key] != values:
+            self.widget.item(key, values=values)
+
+    def _delete_item(self, index, key):
+        self.widget.delete(key)
+
+    def _selected_keys(self):
+        # Os iids sobrevivem à atualização, então a seleção se mantém sozinha
+        return None
+
+    def _restore(self, top_key, selected):
+        if top_key in self.values:
+            self.widget.yview_moveto(self.keys.index(top_key) / len(self.keys))
+
+
+class ListboxBinder(_KeyedBinder):
+    """Binder para tk.Listbox; format_row devolve o texto da linha"""
+
+    def row_at(self, index):
+        """Linha exibida na posição index do listbox"""
+        return self.rows[self.keys[index]]
+
+    def selected_rows(self):
+        return [self.row_at(index) for index in self.widget.curselection()]
+
+    def _insert_item(self, index, key, values):
+        self.widget.insert(index, values)
+
+    def _update_item(self, index, key, values):
+        self.widget.delete(index)
+        self.widget.insert(index, values)
+
+    def _move_item(self, old_index, index, key, values):
+        self.widget.delete(old_index)
+        self.widget.insert(index, values)
+
+    def _delete_item(self, index, key):
+        self.widget.delete(index)
+
+    def _selected_keys(self):
+        return [self.keys[index] for index in self.widget.curselection()]
+
+    def _restore(self, top_key, selected):
+        # O listbox perde a seleção de itens reinseridos; reaplicamos por chave
+        self.widget.selection_clear(0, tk.END)
+        positions = {key: index for index, key in enumerate(self.keys)}
+        for key in selected:
+            if key in positions:
+                self.widget.selection_set(positions[key])
+
+        if top_key in positions:
+            self.widget.yview(positions[top_key])
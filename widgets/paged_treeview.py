@@ -0,0 +1,164 @@
+from collections import deque
+from widgets.keyed_binder import TreeviewBinder
+
+
+class PagedTreeview:
+    """Adaptador que carrega uma ttk.Treeview sob demanda, página a página.
+
+    Apenas uma janela de páginas fica materializada: ao rolar perto do fim
+    a próxima página é buscada (keyset, após a última chave carregada) e ao
+    rolar perto do topo a anterior; páginas distantes são descartadas.
+
+    fetch_page(after=None, before=None, limit=n) deve devolver as linhas em
+    ordem crescente de chave; row_key(row) devolve a chave da linha e
+    row_id(row) o identificador usado como iid na treeview.
+
+    Com um DbWorker as páginas são buscadas fora da thread do Tk; uma nova
+    chamada a reset() cancela buscas ainda pendentes. Após gravações use
+    refresh(): a janela carregada é relida e só as linhas alteradas mudam
+    na treeview, preservando seleção e rolagem.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, format_row, row_key, row_id=lambda row: row[0],
+                 page_size=100, max_pages=5, margin=0.15, worker=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.format_row = format_row
+        self.row_key = row_key
+        self.row_id = row_id
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.margin = margin
+        self.worker = worker
+
+        self.pages = deque()  # lista de páginas carregadas (cada uma, lista de linhas)
+        self.binder = TreeviewBinder(tree, format_row, row_id)
+        self.has_more_before = False
+        self.has_more_after = False
+        self._loading = False
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def reset(self):
+        """Volta ao início e carrega a primeira página"""
+        self._loading = True
+        self._fetch(self._on_first_page, limit=self.page_size)
+
+    def refresh(self):
+        """Relê as linhas já carregadas e aplica só as diferenças"""
+        if not self.pages:
+            self.reset()
+            return
+
+        anchor = self.row_key(self.pages[0][0]) if self.has_more_before else None
+        limit = sum(len(page) for page in self.pages)
+        self._loading = True
+        self._fetch(lambda window: self._on_refresh(window, limit),
+                    anchor=anchor, limit=limit, fetch=self._fetch_window)
+
+    def _fetch(self, callback, fetch=None, **page):
+        """Busca uma página, no worker se houver, e entrega a callback"""
+        fetch = fetch or self.fetch_page
+        if self.worker is None:
+            callback(fetch(**page))
+        else:
+            self.worker.submit(fetch, on_success=callback, on_error=self._on_fetch_error,
+                               key=id(self), **page)
+
+    def _fetch_window(self, anchor, limit):
+        """(linhas, há anteriores) a partir da primeira linha carregada, inclusive"""
+        if anchor is not None:
+            previous = self.fetch_page(before=anchor, limit=1)
+            if previous:
+                return self.fetch_page(after=self.row_key(previous[0]), limit=limit), True
+        return self.fetch_page(limit=limit), False
+
+    def _on_fetch_error(self, error):
+        self._loading = False
+        raise error
+
+    def _on_first_page(self, page):
+        self._loading = False
+        self.has_more_before = False
+        self.has_more_after = len(page) == self.page_size
+        self._set_window(page)
+        self.tree.yview_moveto(0)
+
+    def _on_refresh(self, window, limit):
+        self._loading = False
+        rows, self.has_more_before = window
+        self.has_more_after = len(rows) == limit
+        self._set_window(rows)
+
+    def _set_window(self, rows):
+        # Linhas que continuam carregadas mantêm o iid, a seleção e a posição
+        self.binder.update(rows)
+        self.pages = deque(rows[start:start + self.page_size]
+                           for start in range(0, len(rows), self.page_size))
+
+    def get_row(self, iid):
+        """Linha original correspondente a um item da treeview"""
+        return self.binder.get_row(str(iid))
+
+    def loaded_rows(self):
+        """Linhas atualmente materializadas, em ordem"""
+        return [row for page in self.pages for row in page]
+
+    def _insert_page(self, page, at_top):
+        self.binder.insert(page, 0 if at_top else None)
+
+        if at_top:
+            self.pages.appendleft(page)
+        else:
+            self.pages.append(page)
+
+    def _drop_page(self, from_top):
+        page = self.pages.popleft() if from_top else self.pages.pop()
+        self.binder.remove(str(self.row_id(row)) for row in page)
+        return len(page)
+
+    def _load_next(self):
+        last_key = self.row_key(self.pages[-1][-1])
+        self._loading = True
+        self._fetch(self._on_next_page, after=last_key, limit=self.page_size)
+
+    def _on_next_page(self, page):
+        self._loading = False
+        self.has_more_after = len(page) == self.page_size
+        if not page:
+            return
+
+        self._insert_page(page, at_top=False)
+        if len(self.pages) > self.max_pages:
+            # Remover linhas acima desloca a visão; compensamos a rolagem
+            removed = self._drop_page(from_top=True)
+            self.has_more_before = True
+            self.tree.yview_scroll(-removed, "units")
+
+    def _load_previous(self):
+        first_key = self.row_key(self.pages[0][0])
+        self._loading = True
+        self._fetch(self._on_previous_page, before=first_key, limit=self.page_size)
+
+    def _on_previous_page(self, page):
+        self._loading = False
+        self.has_more_before = len(page) == self.page_size
+        if not page:
+            return
+
+        self._insert_page(page, at_top=True)
+        self.tree.yview_scroll(len(page), "units")
+        if len(self.pages) > self.max_pages:
+            self._drop_page(from_top=False)
+            self.has_more_after = True
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading or not self.pages:
+            return
+
+        if float(last) >= 1 - self.margin and self.has_more_after:
+            self._load_next()
+        elif float(first) <= self.margin and self.has_more_before:
+            self._load_previous()
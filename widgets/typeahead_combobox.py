@@ -0,0 +1,88 @@
+from tkinter import ttk
+
+# Teclas que não alteram o texto digitado
+_NAVIGATION_KEYS = {"Up", "Down", "Left", "Right", "Return", "KP_Enter", "Tab", "Escape",
+                    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+
+class TypeaheadCombobox(ttk.Combobox):
+    """Combobox com autocompletar sobre um PrefixIndex em memória.
+
+    A cada pausa na digitação (delay_ms) a lista passa a conter só as
+    limit melhores correspondências do texto, sem consultar o banco;
+    index_source() devolve o índice atual (reconstruído pelo cache só após
+    alterações). Enter ou sair do campo completa com a primeira
+    correspondência; all_label, se dado, é a opção usada com o campo vazio
+    (ex.: "Todos" num filtro).
+    """
+
+    def __init__(self, parent, index_source, format_row, limit=20, delay_ms=150, all_label=None, **kwargs):
+        super().__init__(parent, postcommand=self._on_post, **kwargs)
+        self.index_source = index_source
+        self.format_row = format_row
+        self.limit = limit
+        self.delay_ms = delay_ms
+        self.all_label = all_label
+        self._job = None
+        self._rows_by_text = {}
+
+        self.bind("<KeyRelease>", self._on_key)
+        self.bind("<Return>", lambda e: self.accept())
+        self.bind("<FocusOut>", lambda e: self.accept())
+
+    def selected_row(self):
+        """Linha correspondente ao texto atual (None se vazio ou sem correspondência)"""
+        return self._rows_by_text.get(self.get())
+
+    def accept(self):
+        """Completa o texto com a primeira correspondência e devolve a linha"""
+        text = self.get()
+        if text in self._rows_by_text or text == self.all_label:
+            return self._rows_by_text.get(text)
+
+        matches = self.index_source().search(text, 1) if text.strip() else []
+        if matches:
+            self.set(self._remember(matches[0]))
+            return matches[0]
+
+        self.set(self.all_label or "")
+        return None
+
+    def set_row(self, row):
+        """Mostra row como a opção escolhida"""
+        self.set(self._remember(row))
+
+    def _remember(self, row):
+        text = self.format_row(row)
+        self._rows_by_text[text] = row
+        return text
+
+    def _update_values(self, text=None):
+        self._job = None
+        current = self.get()
+        text = current if text is None else text
+
+        # Mantém a opção já escolhida reconhecível enquanto a lista muda
+        chosen = self._rows_by_text.get(current)
+        self._rows_by_text = {current: chosen} if chosen is not None else {}
+
+        values = [self._remember(row) for row in self.index_source().search(text, self.limit)]
+        if self.all_label and not text.strip():
+            values.insert(0, self.all_label)
+        self["values"] = values
+
+    def _on_key(self, event):
+        if event.keysym in _NAVIGATION_KEYS:
+            return
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._job = self.after(self.delay_ms, self._update_values)
+
+    def _on_post(self):
+        # Ao abrir a lista: correspondências do texto digitado, ou o início
+        # da lista se o texto já é uma opção escolhida
+        if self._job is not None:
+            self.after_cancel(self._job)
+        text = self.get()
+        chosen = text in self._rows_by_text or text == self.all_label
+        self._update_values("" if chosen else text)
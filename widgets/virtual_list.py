@@ -0,0 +1,126 @@
+import tkinter as tk
+from widgets.keyed_binder import ListboxBinder
+
+
+class VirtualList(tk.Frame):
+    """Lista virtualizada: só as linhas visíveis existem no tk.Listbox.
+
+    Os dados vêm de row_provider(start, count), que devolve as linhas da
+    janela pedida, e row_count, o total de linhas; set_rows(rows) é um
+    atalho para listas já em memória. A barra de rolagem, a roda do mouse
+    e as setas movem a janela, e só as linhas que entram ou saem dela são
+    formatadas e redesenhadas.
+
+    A seleção é guardada pela chave da linha (row_id), então sobrevive à
+    rolagem e a novas cargas; ao selecionar é gerado <<VirtualListSelect>>
+    e selected_row() devolve a linha escolhida.
+    """
+
+    def __init__(self, parent, format_row, row_id=lambda row: row[0], height=10, width=80, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.height = height
+        self.row_count = 0
+        self.row_provider = lambda start, count: []
+        self.top = 0              # índice da primeira linha visível
+        self.visible = []         # linhas atualmente exibidas
+        self._selected_key = None
+        self._selected_row = None
+
+        self.listbox = tk.Listbox(self, height=height, width=width, exportselection=False, activestyle="none")
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.binder = ListboxBinder(self.listbox, format_row, row_id)
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-1 if e.delta > 0 else 1, 3))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-1, 3))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(1, 3))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self._move_selection(-height))
+        self.listbox.bind("<Next>", lambda e: self._move_selection(height))
+
+    def set_source(self, row_count, row_provider):
+        """Troca a fonte de dados mantendo a rolagem e a seleção"""
+        self.row_count = row_count
+        self.row_provider = row_provider
+        self.top = max(0, min(self.top, row_count - self.height))
+        self._render()
+
+    def set_rows(self, rows):
+        """Fonte de dados a partir de uma lista já carregada"""
+        self.set_source(len(rows), lambda start, count: rows[start:start + count])
+
+    def selected_row(self):
+        return self._selected_row
+
+    def clear_selection(self):
+        self._selected_key = None
+        self._selected_row = None
+        self.listbox.selection_clear(0, tk.END)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self.row_count - self.height))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _render(self):
+        self.visible = list(self.row_provider(self.top, self.height))
+        self.binder.update(self.visible)
+
+        # Reaplica a seleção se a linha escolhida estiver na janela
+        self.listbox.selection_clear(0, tk.END)
+        for index, row in enumerate(self.visible):
+            if self.binder.key(row) == self._selected_key:
+                self._selected_row = row
+                self.listbox.selection_set(index)
+                break
+
+        if self.row_count:
+            self.scrollbar.set(self.top / self.row_count, (self.top + len(self.visible)) / self.row_count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * self.row_count))
+        elif action == "scroll":
+            self._scroll_by(int(args[0]), 1 if args[1] == "units" else self.height)
+
+    def _scroll_by(self, direction, step):
+        self.scroll_to(self.top + direction * step)
+        return "break"
+
+    def _select_index(self, index):
+        row = self.visible[index]
+        self._selected_key = self.binder.key(row)
+        self._selected_row = row
+        self.event_generate("<<VirtualListSelect>>")
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if selection and selection[0] < len(self.visible):
+            self._select_index(selection[0])
+
+    def _move_selection(self, delta):
+        """Move a seleção pelas setas, rolando a janela quando preciso"""
+        if not self.row_count:
+            return "break"
+
+        selection = self.listbox.curselection()
+        current = self.top + selection[0] if selection else self.top - 1
+        target = max(0, min(current + delta, self.row_count - 1))
+
+        if target < self.top:
+            self.scroll_to(target)
+        elif target >= self.top + self.height:
+            self.scroll_to(target - self.height + 1)
+
+        index = target - self.top
+        if index < len(self.visible):
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(index)
+            self._select_index(index)
+        return "break"